@@ -0,0 +1,37 @@
+"""Bake strategies.yaml into an importable Python module.
+
+Run from the backend directory after editing strategies.yaml:
+
+    python -m config.bake_strategies
+
+Writes config/strategies_compiled.py with the parsed config as a Python
+literal plus the source file's (st_mtime_ns, st_size) key, so
+load_strategies_config can import it at .pyc/marshal speed and fall back
+to a normal YAML parse whenever the baked copy is stale or missing.
+"""
+from pathlib import Path
+from pprint import pformat
+
+import yaml
+
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def bake() -> Path:
+    path = Path(__file__).parent / "strategies.yaml"
+    stat = path.stat()
+    with open(path, "rb") as f:
+        config = yaml.load(f, Loader=YamlLoader)
+
+    out_path = path.parent / "strategies_compiled.py"
+    out_path.write_text(
+        "# Generated by config.bake_strategies from strategies.yaml -- do not edit.\n"
+        f"SOURCE_KEY = {(stat.st_mtime_ns, stat.st_size)!r}\n\n"
+        f"CONFIG = {pformat(config, sort_dicts=False)}\n",
+        encoding="utf-8",
+    )
+    return out_path
+
+
+if __name__ == "__main__":
+    print(f"Wrote {bake()}")
@@ -1,13 +1,57 @@
-from pydantic_settings import BaseSettings
+from dataclasses import dataclass
 from functools import lru_cache
 from pathlib import Path
+import os
+import pickle
+import tempfile
 import yaml
-from dotenv import load_dotenv
 
-# Load .env file
-load_dotenv(Path(__file__).parent.parent / ".env")
+# Prefer libyaml's C-based loader when available (~10x faster parse)
+YamlLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
 
-class Settings(BaseSettings):
+# Resolve paths once at import; .resolve() collapses symlinks up front
+_HERE = Path(__file__).resolve().parent
+_STRATEGIES_PATH = _HERE / "strategies.yaml"
+_DOTENV_PATH = _HERE.parent / ".env"
+
+def _load_env_file(path: Path) -> None:
+    """Minimal .env loader for the simple KEY=VALUE format we use.
+
+    Existing environment variables always win (setdefault semantics,
+    matching python-dotenv's default override=False behaviour).
+    """
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return
+    for line in data.decode("utf-8").splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        key, eq, val = line.partition("=")
+        if not eq:
+            continue
+        os.environ.setdefault(key.strip(), val.strip().strip('"').strip("'"))
+
+# Load .env file once per process, even if this module is imported under
+# two names (e.g. config.settings and backend.config.settings).
+# Production deployments (ENV=production) must inject real env vars via
+# the init system (Docker Compose env_file, systemd, etc.); .env is a
+# development convenience and is skipped there entirely.
+if os.environ.get("ENV", "dev") != "production" and os.environ.get("DOTENV_LOADED") != "1":
+    _load_env_file(_DOTENV_PATH)
+    os.environ["DOTENV_LOADED"] = "1"
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+# Plain frozen dataclass instead of pydantic BaseSettings: for ~13 scalar
+# fields a direct os.getenv loader is far cheaper at import time, there is
+# no validator graph to build per process, and a frozen instance is safely
+# shareable across threads. No slots=True: the production image runs
+# Python 3.9 and dataclass slots landed in 3.10.
+@dataclass(frozen=True)
+class Settings:
     eodhd_api_key: str = ""
     database_url: str = "sqlite:///./app.db"
     api_host: str = "0.0.0.0"
@@ -15,7 +59,7 @@ class Settings(BaseSettings):
     log_level: str = "info"
     data_sync_enabled: bool = True
     data_sync_hour: int = 18
-    
+
     # Email alerts (optional)
     alert_email: str = ""  # Email to send alerts to
     smtp_host: str = ""
@@ -23,17 +67,70 @@ class Settings(BaseSettings):
     smtp_user: str = ""
     smtp_password: str = ""
     smtp_from: str = "alerts@borslabbet.local"
-    
-    class Config:
-        env_file = ".env"
-        extra = "ignore"
 
-@lru_cache
+def _load_settings() -> Settings:
+    return Settings(
+        eodhd_api_key=os.getenv("EODHD_API_KEY", ""),
+        database_url=os.getenv("DATABASE_URL", "sqlite:///./app.db"),
+        api_host=os.getenv("API_HOST", "0.0.0.0"),
+        api_port=int(os.getenv("API_PORT", "8000")),
+        log_level=os.getenv("LOG_LEVEL", "info"),
+        data_sync_enabled=_env_bool("DATA_SYNC_ENABLED", "true"),
+        data_sync_hour=int(os.getenv("DATA_SYNC_HOUR", "18")),
+        alert_email=os.getenv("ALERT_EMAIL", ""),
+        smtp_host=os.getenv("SMTP_HOST", ""),
+        smtp_port=int(os.getenv("SMTP_PORT", "587")),
+        smtp_user=os.getenv("SMTP_USER", ""),
+        smtp_password=os.getenv("SMTP_PASSWORD", ""),
+        smtp_from=os.getenv("SMTP_FROM", "alerts@borslabbet.local"),
+    )
+
+# Built once at import; get_settings stays callable for FastAPI Depends()
+# but each call is now just a global load instead of an lru_cache lookup.
+_settings = _load_settings()
+
 def get_settings() -> Settings:
-    return Settings()
+    return _settings
 
 @lru_cache
 def load_strategies_config() -> dict:
-    path = Path(__file__).parent / "strategies.yaml"
-    with open(path) as f:
-        return yaml.safe_load(f)
+    path = _STRATEGIES_PATH
+    stat = path.stat()
+    key = (stat.st_mtime_ns, stat.st_size)
+    pkl_path = path.with_suffix(".yaml.pkl")
+
+    # Fastest path: a baked strategies_compiled.py (see bake_strategies),
+    # loaded from its .pyc at marshal speed. Only trusted if it was baked
+    # from the yaml file as it is on disk now.
+    try:
+        from . import strategies_compiled
+        if strategies_compiled.SOURCE_KEY == key:
+            return strategies_compiled.CONFIG
+    except ImportError:
+        pass
+
+    # Warm start: load the pickled parse if it matches the yaml file
+    try:
+        with open(pkl_path, "rb") as f:
+            cached_key, config = pickle.load(f)
+        if cached_key == key:
+            return config
+    except (OSError, pickle.UnpicklingError, ValueError, EOFError):
+        pass
+
+    # One read() into a contiguous buffer; libyaml scans bytes directly
+    # instead of pulling chunks through a Python file object
+    with open(path, "rb") as f:
+        data = f.read()
+    config = yaml.load(data, Loader=YamlLoader)
+
+    # Refresh the pickle cache atomically; best-effort on read-only filesystems
+    try:
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, suffix=".pkl.tmp")
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump((key, config), f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, pkl_path)
+    except OSError:
+        pass
+
+    return config
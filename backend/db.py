@@ -1,27 +1,184 @@
+import os
+from contextlib import contextmanager
+
 from sqlalchemy import create_engine, text, event
 from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.pool import QueuePool
 from config.settings import get_settings
 
+# Declared first so metadata-only importers (Alembic-style scripts, model
+# modules) are not coupled to the engine setup below. Neither settings
+# resolution (plain dataclass) nor create_engine (no connection until
+# first use) does real work at import time.
+Base = declarative_base()
+
 settings = get_settings()
+_is_memory_db = ":memory:" in settings.database_url
+
+# SQLite under WAL allows many concurrent readers but only one writer.
+# Endpoints that have been audited as read-only take their sessions from a
+# separate pool that opens the database read-only (query_only=ON), so they
+# can never take the write lock; everything else shares the main engine.
+if not _is_memory_db and settings.database_url.startswith("sqlite:///"):
+    _db_file = settings.database_url[len("sqlite:///"):]
+    # URI form so open mode and cache behaviour are fixed at connect time;
+    # cache=private keeps connections from sharing a page cache (shared
+    # cache is deprecated and a known source of SQLITE_BUSY storms).
+    _write_url = f"sqlite:///file:{_db_file}?mode=rwc&cache=private&uri=true"
+    _write_connect_args = {"check_same_thread": False, "timeout": 30, "uri": True}
+else:
+    _write_url = settings.database_url
+    _write_connect_args = {"check_same_thread": False, "timeout": 30}
+
+# query_cache_size sized well above our unique-statement count so compiled
+# SQL never falls out of the LRU; echo=False skips the per-execute log check.
+# This engine still serves every endpoint that has not been audited as
+# read-only, so it keeps a normally sized pool; SQLite serializes the
+# actual writes itself, and busy_timeout covers contention between them.
 engine = create_engine(
-    settings.database_url, 
-    connect_args={"check_same_thread": False, "timeout": 30}
+    _write_url,
+    pool_size=5,
+    max_overflow=10,
+    query_cache_size=1024,
+    echo=False,
+    connect_args=_write_connect_args
 )
 
-# Enable WAL mode for better concurrent read/write performance
-@event.listens_for(engine, "connect")
-def set_sqlite_pragma(dbapi_connection, connection_record):
-    cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA journal_mode=WAL")
-    cursor.execute("PRAGMA busy_timeout=30000")
-    cursor.close()
+if not _is_memory_db and settings.database_url.startswith("sqlite:///"):
+    # Explicit QueuePool: WAL lets readers run fully in parallel, so size
+    # the pool to the CPU count. No pre-ping (file connections don't drop)
+    # and no recycling, so a checkout is just a queue pop.
+    read_engine = create_engine(
+        f"sqlite:///file:{_db_file}?mode=ro&uri=true",
+        poolclass=QueuePool,
+        pool_size=max(4, os.cpu_count() or 0),
+        max_overflow=0,
+        pool_pre_ping=False,
+        pool_recycle=-1,
+        query_cache_size=1024,
+        echo=False,
+        connect_args={"check_same_thread": False, "timeout": 30, "uri": True}
+    )
+else:
+    read_engine = engine
 
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
+# Performance PRAGMAs: WAL for concurrent reads/writes, relaxed fsync
+# (crash-safe under WAL), a 20MB page cache, in-memory temp storage and
+# memory-mapped I/O. Skipped for in-memory databases where WAL is a no-op.
+if not _is_memory_db:
+    @event.listens_for(engine, "connect")
+    def set_sqlite_pragma(dbapi_connection, connection_record):
+        dbapi_connection.executescript(
+            "PRAGMA journal_mode=WAL;"
+            "PRAGMA synchronous=NORMAL;"
+            "PRAGMA busy_timeout=30000;"
+            "PRAGMA cache_size=-20000;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA foreign_keys=ON;"
+            "PRAGMA mmap_size=268435456;"
+        )
+
+    # No forced BEGIN IMMEDIATE here: this engine still serves plenty of
+    # read traffic, and immediate mode would take SQLite's single write
+    # lock on every transaction - including every GET - serializing the
+    # API on one lock. Transactions start deferred and upgrade on the
+    # first write; busy_timeout=30000 absorbs the upgrade contention.
+    # Revisit once all reads run on the read-only engine.
+    @event.listens_for(read_engine, "connect")
+    def set_sqlite_read_pragma(dbapi_connection, connection_record):
+        dbapi_connection.executescript(
+            "PRAGMA busy_timeout=30000;"
+            "PRAGMA cache_size=-20000;"
+            "PRAGMA temp_store=MEMORY;"
+            "PRAGMA mmap_size=268435456;"
+            "PRAGMA query_only=ON;"
+        )
+
+# expire_on_commit=False keeps attributes readable after commit without a
+# re-SELECT per object; don't mutate committed objects without a refresh.
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False,
+    bind=engine, future=True
+)
+ReadSessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False,
+    bind=read_engine, future=True
+)
+
+def ensure_indexes():
+    """Idempotent CREATE INDEX for indexes added after the tables already
+    existed (create_all only creates missing tables) and for expression
+    indexes a Column(index=True) can't declare. Called from app startup."""
+    with engine.begin() as conn:
+        # Drives the reclassify select in scan_new_stocks_job
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_stocks_stock_type ON stocks (stock_type)"
+        )
+        # avanza_id is stored as TEXT; the MAX(CAST(...)) scan-range query
+        # can only use an index on the exact same expression
+        conn.exec_driver_sql(
+            "CREATE INDEX IF NOT EXISTS ix_stocks_avanza_id_int "
+            "ON stocks (CAST(avanza_id AS INTEGER)) WHERE avanza_id IS NOT NULL"
+        )
+        # The sync bulk-UPSERT conflicts on (ticker, data_source). Legacy
+        # databases predate the unique constraint and may hold duplicate
+        # rows, so keep only the newest per pair before adding the index.
+        index_names = {
+            row[1] for row in conn.exec_driver_sql("PRAGMA index_list('fundamentals')")
+        }
+        if "uq_fundamentals_ticker_source" not in index_names:
+            conn.exec_driver_sql(
+                "DELETE FROM fundamentals WHERE id NOT IN ("
+                "SELECT MAX(id) FROM fundamentals GROUP BY ticker, data_source)"
+            )
+            conn.exec_driver_sql(
+                "CREATE UNIQUE INDEX uq_fundamentals_ticker_source "
+                "ON fundamentals (ticker, data_source)"
+            )
+
+def warm_pools():
+    """Pre-open pooled connections so the first requests skip connection
+    setup (PRAGMAs, WAL file creation). Called from app startup."""
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SELECT 1")
+    if read_engine is not engine:
+        conns = []
+        try:
+            for _ in range(read_engine.pool.size()):
+                conns.append(read_engine.connect())
+            for conn in conns:
+                conn.exec_driver_sql("SELECT 1")
+        finally:
+            for conn in conns:
+                conn.close()
 
+@contextmanager
+def session_scope():
+    """Transactional scope for background jobs: commit on success,
+    rollback on error, always return the connection to the pool."""
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+# FastAPI dependencies need the generator signature; non-request code
+# should prefer `with SessionLocal() as db:` (2.0-style sessions are
+# context managers), which skips the generator frame entirely.
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
@@ -1,43 +1,148 @@
 """
 APScheduler jobs for automatic data fetching.
 """
-import logging
 import asyncio
+import json
+import logging
 import os
-from datetime import datetime
-from apscheduler.schedulers.background import BackgroundScheduler
+import random
+import time
+from datetime import date, datetime, timedelta, timezone
+
+try:
+    import orjson  # Optional: C-based JSON, much faster on lists of small dicts
+except ImportError:
+    orjson = None
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from apscheduler.executors.pool import ThreadPoolExecutor
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.cron import CronTrigger
+from apscheduler.triggers.date import DateTrigger
+from sqlalchemy import func, text
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from config.settings import get_settings
-from db import SessionLocal
+from db import session_scope
+from models import (
+    DailyPrice, Fundamentals, FundamentalsSnapshot, IsinLookup,
+    PushSubscription, RankingsSnapshot, Stock, SyncLog, User,
+)
+from services.alerting import (
+    check_and_create_alerts, mark_alerts_notified, resolve_old_alerts,
+    send_alert_email,
+)
+from services.avanza_fetcher_v2 import avanza_sync
+from services.email_notifications import generate_monthly_rankings_email
+from services.email_reports import (
+    format_monthly_email, format_rebalance_email, generate_monthly_report,
+    generate_rebalance_report, send_report_email, should_send_monthly_report,
+    should_send_rebalance_reminder,
+)
+# Imported as modules (not names) so tests can patch their attributes
+from services import ranking_cache, tradingview_fetcher
+from services.stock_scanner import classify_stock_type, scan_for_new_stocks
+from services.stock_validator import mark_stocks_with_fundamentals_active
+
+__all__ = [
+    "scheduler", "tradingview_sync", "sync_job", "scan_new_stocks_job",
+    "send_reports_job", "cleanup_old_data_job", "rebalance_reminder_job",
+    "start_scheduler", "stop_scheduler", "get_scheduler_status",
+]
 
 logger = logging.getLogger(__name__)
 
-scheduler = BackgroundScheduler()
+# AsyncIOScheduler runs coroutine jobs directly on the application's event
+# loop — no per-run asyncio.run() loop bootstrap/teardown as with the old
+# BackgroundScheduler thread bridge. Sync jobs go to a bounded two-worker
+# thread pool (executor="threads") so a slow job can't pile up threads.
+scheduler = AsyncIOScheduler(executors={
+    "default": AsyncIOExecutor(),
+    "threads": ThreadPoolExecutor(max_workers=2),
+})
 
-# Track retry state
-_sync_retry_count = 0
+# Retry state rides on the scheduled retry job itself (kwargs) rather
+# than module-global mutable state, so it stays coherent even if the app
+# is ever run pre-forked — each retry knows its own attempt number.
 _MAX_RETRIES = 2
 
+# Strong references to scheduled retry jobs. The jobstore keeps its own
+# reference, but holding ours guarantees a pending retry can't be dropped
+# if the job entry is evicted/replaced before it fires.
+_pending_retry_jobs = {}
+
 # Data source: 'tradingview' or 'avanza'
 DATA_SOURCE = os.getenv('DATA_SOURCE', 'tradingview')
 
+# Settings are an immutable snapshot of the environment; resolve once at
+# import instead of per job run
+_SETTINGS = get_settings()
+
+# Fundamentals columns fed straight from TradingView rows; the sync upsert
+# inserts and conflict-updates exactly these (plus ticker/data_source keys
+# and fetched_date)
+_FUND_METRIC_COLS = (
+    'market_cap', 'pe', 'pb', 'ps', 'p_fcf', 'ev_ebitda', 'roe', 'roa',
+    'roic', 'fcfroe', 'dividend_yield', 'net_income', 'operating_cf',
+    'total_assets', 'long_term_debt', 'current_ratio', 'gross_margin',
+    'shares_outstanding', 'perf_1m', 'perf_3m', 'perf_6m', 'perf_12m',
+    'piotroski_f_score',
+)
+
+# Snapshot rows are built as positional tuples and inserted straight
+# through the driver: no per-row dict construction or kwarg→column mapping
+_SNAPSHOT_COLS = (
+    'snapshot_date', 'ticker', 'market_cap', 'pe', 'pb', 'ps', 'p_fcf',
+    'ev_ebitda', 'roe', 'roa', 'roic', 'fcfroe', 'dividend_yield',
+)
+_SNAPSHOT_INSERT_SQL = "INSERT INTO fundamentals_snapshots ({}) VALUES ({})".format(
+    ", ".join(_SNAPSHOT_COLS), ", ".join("?" * len(_SNAPSHOT_COLS))
+)
+
+# On-conflict upsert constructs built once at import: each run reuses the
+# same Core statement, whose compiled SQL lives in the engine's statement
+# cache, instead of rebuilding (or re-parsing) it per sync
+_fund_ins = sqlite_insert(Fundamentals.__table__)
+_FUND_UPSERT = _fund_ins.on_conflict_do_update(
+    index_elements=['ticker', 'data_source'],
+    set_={col: _fund_ins.excluded[col] for col in _FUND_METRIC_COLS + ('fetched_date',)},
+)
+_price_ins = sqlite_insert(DailyPrice.__table__)
+_DAILY_PRICE_UPSERT = _price_ins.on_conflict_do_update(
+    index_elements=['ticker', 'date'],
+    set_={'close': _price_ins.excluded.close},
+)
+_isin_ins = sqlite_insert(IsinLookup.__table__)
+_ISIN_UPSERT = _isin_ins.on_conflict_do_update(
+    index_elements=['isin'],
+    set_={col: _isin_ins.excluded[col]
+          for col in ('ticker', 'name', 'currency', 'market', 'updated_at')},
+)
+
+
+def _email_config(settings) -> dict:
+    """SMTP config dict expected by the alert/report email helpers."""
+    return {
+        'alert_email': settings.alert_email,
+        'smtp_host': settings.smtp_host,
+        'smtp_port': settings.smtp_port,
+        'smtp_user': settings.smtp_user,
+        'smtp_password': settings.smtp_password,
+        'smtp_from': settings.smtp_from,
+    }
+
 
-async def tradingview_sync(db, force_refresh: bool = False) -> dict:
+def tradingview_sync(db, force_refresh: bool = False) -> dict:
     """
     Sync fundamentals from TradingView Scanner API.
     Much faster than Avanza (~1s vs ~51s).
     Saves weekly snapshots for historical backtesting.
     """
-    from services.tradingview_fetcher import TradingViewFetcher
-    from services.ticker_mapping import tv_to_db_ticker
-    from models import Fundamentals, Stock, FundamentalsSnapshot
-    from datetime import date, timedelta
-    import time
-    
     start_time = time.time()
-    fetcher = TradingViewFetcher()
+    fetcher = tradingview_fetcher.TradingViewFetcher()
     today = date.today()
+    # ISO form for the positional snapshot insert: raw driver rows bypass
+    # SQLAlchemy's date→string bind processing
+    today_iso = today.isoformat()
     
     try:
         stocks = fetcher.fetch_all(min_market_cap=2e9)
@@ -49,55 +154,33 @@ async def tradingview_sync(db, force_refresh: bool = False) -> dict:
         # Get existing tickers for matching
         existing_stocks = {s.ticker: s for s in db.query(Stock).all()}
         
-        # Check if we should save a snapshot (weekly for historical backtesting)
+        # Check if we should save a snapshot (weekly for historical
+        # backtesting). EXISTS instead of .first(): SQLite stops at the
+        # first index hit and no ORM row is materialized.
         week_start = today - timedelta(days=today.weekday())
-        existing_snapshot = db.query(FundamentalsSnapshot).filter(
-            FundamentalsSnapshot.snapshot_date >= week_start
-        ).first()
-        save_snapshot = existing_snapshot is None
-        
-        updated = 0
-        snapshots_saved = 0
+        save_snapshot = not db.query(
+            db.query(FundamentalsSnapshot).filter(
+                FundamentalsSnapshot.snapshot_date >= week_start
+            ).exists()
+        ).scalar()
+        
+        # Single pass over the fetched stocks: collect fundamentals,
+        # snapshot, price and ISIN rows together and apply the stock
+        # metadata updates, instead of re-walking the list per table
+        now = datetime.now()
+        fund_rows = []
+        snapshot_rows = []
+        price_rows = []
+        isin_rows = []
         for stock_data in stocks:
             db_ticker = stock_data['db_ticker']
-            
-            # Update or create fundamentals record
-            fund = db.query(Fundamentals).filter(
-                Fundamentals.ticker == db_ticker,
-                Fundamentals.data_source == 'tradingview'
-            ).first()
-            
-            if not fund:
-                fund = Fundamentals(ticker=db_ticker)
-                db.add(fund)
-            
-            # Update all fields
-            fund.market_cap = stock_data.get('market_cap')
-            fund.pe = stock_data.get('pe')
-            fund.pb = stock_data.get('pb')
-            fund.ps = stock_data.get('ps')
-            fund.p_fcf = stock_data.get('p_fcf')
-            fund.ev_ebitda = stock_data.get('ev_ebitda')
-            fund.roe = stock_data.get('roe')
-            fund.roa = stock_data.get('roa')
-            fund.roic = stock_data.get('roic')
-            fund.fcfroe = stock_data.get('fcfroe')
-            fund.dividend_yield = stock_data.get('dividend_yield')
-            fund.net_income = stock_data.get('net_income')
-            fund.operating_cf = stock_data.get('operating_cf')
-            fund.total_assets = stock_data.get('total_assets')
-            fund.long_term_debt = stock_data.get('long_term_debt')
-            fund.current_ratio = stock_data.get('current_ratio')
-            fund.gross_margin = stock_data.get('gross_margin')
-            fund.shares_outstanding = stock_data.get('shares_outstanding')
-            fund.perf_1m = stock_data.get('perf_1m')
-            fund.perf_3m = stock_data.get('perf_3m')
-            fund.perf_6m = stock_data.get('perf_6m')
-            fund.perf_12m = stock_data.get('perf_12m')
-            fund.piotroski_f_score = stock_data.get('piotroski_f_score')
-            fund.data_source = 'tradingview'
-            fund.fetched_date = today
-            
+
+            fund_row = {col: stock_data.get(col) for col in _FUND_METRIC_COLS}
+            fund_row['ticker'] = db_ticker
+            fund_row['data_source'] = 'tradingview'
+            fund_row['fetched_date'] = today
+            fund_rows.append(fund_row)
+
             # Update stock metadata if exists
             if db_ticker in existing_stocks:
                 stock = existing_stocks[db_ticker]
@@ -108,59 +191,49 @@ async def tradingview_sync(db, force_refresh: bool = False) -> dict:
                 # Update ISIN in stocks table
                 if stock_data.get('isin'):
                     stock.isin = stock_data['isin']
-            
+
             # Save weekly snapshot for historical backtesting
+            # (tuple order matches _SNAPSHOT_COLS)
             if save_snapshot:
-                db.add(FundamentalsSnapshot(
-                    snapshot_date=today, ticker=db_ticker,
-                    market_cap=stock_data.get('market_cap'),
-                    pe=stock_data.get('pe'), pb=stock_data.get('pb'), ps=stock_data.get('ps'),
-                    p_fcf=stock_data.get('p_fcf'), ev_ebitda=stock_data.get('ev_ebitda'),
-                    roe=stock_data.get('roe'), roa=stock_data.get('roa'),
-                    roic=stock_data.get('roic'), fcfroe=stock_data.get('fcfroe'),
-                    dividend_yield=stock_data.get('dividend_yield'),
+                snapshot_rows.append((
+                    today_iso, db_ticker,
+                    stock_data.get('market_cap'), stock_data.get('pe'),
+                    stock_data.get('pb'), stock_data.get('ps'),
+                    stock_data.get('p_fcf'), stock_data.get('ev_ebitda'),
+                    stock_data.get('roe'), stock_data.get('roa'),
+                    stock_data.get('roic'), stock_data.get('fcfroe'),
+                    stock_data.get('dividend_yield'),
                 ))
-                snapshots_saved += 1
-            
-            updated += 1
-        
-        # Flush fundamentals before prices to avoid batch conflicts
-        db.flush()
-        
-        # Save daily prices for portfolio tracking using raw SQL upsert
-        from sqlalchemy import text
-        prices_saved = 0
-        for stock_data in stocks:
-            close_price = stock_data.get('close')
-            if not close_price:
-                continue
-            db_ticker = stock_data['db_ticker']
-            # SQLite upsert - insert or update on conflict
-            db.execute(text("""
-                INSERT INTO daily_prices (ticker, date, close) VALUES (:ticker, :date, :close)
-                ON CONFLICT(ticker, date) DO UPDATE SET close = :close
-            """), {"ticker": db_ticker, "date": today, "close": close_price})
-            prices_saved += 1
-        db.flush()
-        
-        # Update ISIN lookup table for CSV import matching
-        from models import IsinLookup
-        isin_updated = 0
-        for stock_data in stocks:
-            isin = stock_data.get('isin')
-            if not isin:
-                continue
-            lookup = db.query(IsinLookup).filter(IsinLookup.isin == isin).first()
-            if not lookup:
-                lookup = IsinLookup(isin=isin)
-                db.add(lookup)
-            lookup.ticker = stock_data['db_ticker']
-            lookup.name = stock_data.get('name')
-            lookup.currency = 'SEK'  # Swedish stocks
-            lookup.market = 'sweden'
-            lookup.updated_at = datetime.now()
-            isin_updated += 1
-        
+
+            # Daily price for portfolio tracking
+            if stock_data.get('close'):
+                price_rows.append(
+                    {"ticker": db_ticker, "date": today, "close": stock_data['close']}
+                )
+
+            # ISIN lookup table for CSV import matching
+            if stock_data.get('isin'):
+                isin_rows.append({
+                    'isin': stock_data['isin'],
+                    'ticker': db_ticker,
+                    'name': stock_data.get('name'),
+                    'currency': 'SEK',  # Swedish stocks
+                    'market': 'sweden',
+                    'updated_at': now,
+                })
+
+        # One bulk UPSERT instead of a SELECT + UPDATE/INSERT per stock:
+        # conflicts on the (ticker, data_source) unique index, all rows in
+        # a single executemany round trip
+        db.execute(_FUND_UPSERT, fund_rows)
+
+        # Weekly snapshots as one positional executemany on the driver
+        if snapshot_rows:
+            db.connection().exec_driver_sql(_SNAPSHOT_INSERT_SQL, snapshot_rows)
+
+        updated = len(fund_rows)
+        snapshots_saved = len(snapshot_rows)
+
         # Also fetch Nordic stocks for ISIN lookup (DK, FI, NO)
         try:
             nordic_stocks = fetcher.fetch_nordic(markets=['denmark', 'finland', 'norway'], min_market_cap_sek=0)
@@ -175,39 +248,41 @@ async def tradingview_sync(db, force_refresh: bool = False) -> dict:
                 market_suffix = {'finland': '.HE', 'denmark': '.CO', 'norway': '.OL'}.get(market, '')
                 prefixed_ticker = f"{base_ticker}{market_suffix}" if market_suffix else base_ticker
                 
-                lookup = db.query(IsinLookup).filter(IsinLookup.isin == isin).first()
-                if not lookup:
-                    lookup = IsinLookup(isin=isin)
-                    db.add(lookup)
-                lookup.ticker = prefixed_ticker
-                lookup.name = stock_data.get('name')
-                lookup.currency = stock_data.get('currency', 'EUR')
-                lookup.market = market
-                lookup.updated_at = datetime.now()
-                isin_updated += 1
-                
+                isin_rows.append({
+                    'isin': isin,
+                    'ticker': prefixed_ticker,
+                    'name': stock_data.get('name'),
+                    'currency': stock_data.get('currency', 'EUR'),
+                    'market': market,
+                    'updated_at': now,
+                })
+
+
                 # Save daily price for Nordic stocks with market suffix
                 close_price = stock_data.get('close')
                 if close_price and prefixed_ticker:
-                    db.execute(text("""
-                        INSERT INTO daily_prices (ticker, date, close) VALUES (:ticker, :date, :close)
-                        ON CONFLICT(ticker, date) DO UPDATE SET close = :close
-                    """), {"ticker": prefixed_ticker, "date": today, "close": close_price})
-                    prices_saved += 1
+                    price_rows.append(
+                        {"ticker": prefixed_ticker, "date": today, "close": close_price}
+                    )
         except Exception as e:
             logger.warning(f"Nordic ISIN sync failed: {e}")
-        
+
+        if price_rows:
+            db.execute(_DAILY_PRICE_UPSERT, price_rows)
+        prices_saved = len(price_rows)
+
+        if isin_rows:
+            db.execute(_ISIN_UPSERT, isin_rows)
+        isin_updated = len(isin_rows)
+
         db.commit()
         
         # Compute rankings using TradingView data
-        from services.ranking_cache import compute_all_rankings_tv, compute_nordic_momentum
-        rankings_result = compute_all_rankings_tv(db)
+        rankings_result = ranking_cache.compute_all_rankings_tv(db)
         
         # Save daily rankings snapshot for historical rank tracking
-        from models import RankingsSnapshot
-        import json
         try:
-            nordic_result = compute_nordic_momentum(db)
+            nordic_result = ranking_cache.compute_nordic_momentum(db)
             if 'rankings' in nordic_result:
                 # Store compact format: [{ticker, rank, isin}]
                 snapshot_data = [
@@ -217,7 +292,8 @@ async def tradingview_sync(db, force_refresh: bool = False) -> dict:
                 snapshot = RankingsSnapshot(
                     strategy='nordic_momentum',
                     snapshot_date=today,
-                    rankings_json=json.dumps(snapshot_data)
+                    rankings_json=(orjson.dumps(snapshot_data).decode()
+                                   if orjson is not None else json.dumps(snapshot_data))
                 )
                 db.add(snapshot)
                 db.commit()
@@ -243,342 +319,372 @@ async def tradingview_sync(db, force_refresh: bool = False) -> dict:
         return {"status": "ERROR", "message": str(e)}
 
 
-def sync_job(is_retry: bool = False):
-    """Job to sync all stock data (fundamentals + prices)."""
-    global _sync_retry_count
-    
-    if is_retry:
-        logger.info(f"Starting RETRY sync (attempt {_sync_retry_count + 1}/{_MAX_RETRIES})")
-    else:
-        logger.info(f"Starting scheduled sync (source: {DATA_SOURCE})")
-        _sync_retry_count = 0
-    
-    db = SessionLocal()
-    sync_success = False
-    
-    try:
-        # TradingView is the only data source - no fallback
-        result = asyncio.run(tradingview_sync(db))
-        if result.get('status') == 'ERROR':
-            raise Exception(f"TradingView sync failed: {result.get('message', 'Unknown error')}")
-        
-        logger.info(f"Sync complete: {result}")
-        sync_success = True
-        _sync_retry_count = 0
-        
-        # Clear backtest cache - results are stale after new data
-        from models import BacktestResult
-        deleted = db.query(BacktestResult).delete()
-        db.commit()
-        logger.info(f"Cleared {deleted} cached backtest results")
-        
-        # Update is_active flag based on which stocks have fundamentals
-        active_result = mark_stocks_with_fundamentals_active(db)
-        if active_result.get('success'):
-            logger.info(f"Updated is_active: {active_result['updated']} stocks")
-        else:
-            logger.error(f"is_active update failed: {active_result.get('error')}")
-        
-        # Check data integrity and create alerts if issues found
+def _run_alert_checks(settings, is_retry: bool):
+    """Data-integrity checks plus the critical-alert digest, on a
+    dedicated session and a worker thread. Raises on check failure
+    (sync_job's retry path handles it)."""
+    with session_scope() as db:
         alert_result = check_and_create_alerts(db)
         if alert_result['alerts_created']:
             logger.warning(f"Data alerts created: {alert_result['alerts_created']}")
-            
-            # Send email for critical alerts
-            settings = get_settings()
-            if settings.alert_email:
-                unnotified = get_unnotified_critical_alerts(db)
+
+            # Send one digest email for critical alerts from this run;
+            # check_and_create_alerts hands them back in-memory, so no
+            # re-SELECT of the alerts table. Skipped on retries: retried
+            # failures either succeed (no email needed) or hit the
+            # retry-exhaustion alert.
+            if settings.alert_email and not is_retry:
+                unnotified = alert_result['unnotified_critical']
                 if unnotified:
-                    email_config = {
-                        'alert_email': settings.alert_email,
-                        'smtp_host': settings.smtp_host,
-                        'smtp_port': settings.smtp_port,
-                        'smtp_user': settings.smtp_user,
-                        'smtp_password': settings.smtp_password,
-                        'smtp_from': settings.smtp_from
-                    }
-                    if send_alert_email(unnotified, email_config):
+                    if send_alert_email(unnotified, _email_config(settings)):
                         mark_alerts_notified(db, [a['id'] for a in unnotified])
         else:
             # No issues - resolve any old alerts
             resolve_old_alerts(db)
-            
-        # Sync Nordic momentum rankings
+
+
+def _run_nordic_momentum():
+    """Nordic momentum ranking refresh on a dedicated session; errors are
+    logged rather than raised, matching the previous inline behaviour."""
+    with session_scope() as db:
         try:
-            from services.ranking_cache import compute_nordic_momentum
-            nordic_result = compute_nordic_momentum(db)
+            nordic_result = ranking_cache.compute_nordic_momentum(db)
             if nordic_result.get('error'):
                 logger.error(f"Nordic momentum sync failed: {nordic_result['error']}")
             else:
                 logger.info(f"Nordic momentum synced: {len(nordic_result.get('rankings', []))} stocks")
         except Exception as nordic_err:
             logger.error(f"Nordic momentum sync error: {nordic_err}")
-        
-        # CRITICAL FIX: Force memory cleanup after sync
-        import gc
-        gc.collect()
-        logger.info("Memory cleanup completed after sync")
-        
+
+
+def _run_sync_pass() -> dict:
+    """The blocking sync pass: TradingView fetch + upserts, backtest-cache
+    clear and is_active refresh on one session. Runs on a worker thread so
+    the event loop stays responsive during the fetch."""
+    with session_scope() as db:
+        # TradingView is the only data source - no fallback
+        result = tradingview_sync(db)
+        if result.get('status') == 'ERROR':
+            raise Exception(f"TradingView sync failed: {result.get('message', 'Unknown error')}")
+
+        logger.info(f"Sync complete: {result}")
+
+        # Clear backtest cache - results are stale after new data.
+        # Raw DELETE without WHERE lets SQLite take its truncate
+        # optimization and skips ORM session synchronization.
+        deleted = db.execute(text("DELETE FROM backtest_results")).rowcount
+        db.commit()
+        logger.info(f"Cleared {deleted} cached backtest results")
+
+        # Update is_active flag based on which stocks have fundamentals
+        active_result = mark_stocks_with_fundamentals_active(db)
+        if active_result.get('success'):
+            logger.info(f"Updated is_active: {active_result['updated']} stocks")
+        else:
+            logger.error(f"is_active update failed: {active_result.get('error')}")
+
+        # Commit the sync writes so the passes that follow see them
+        db.commit()
+    return result
+
+
+async def sync_job(is_retry: bool = False, retry_count: int = 0):
+    """Job to sync all stock data (fundamentals + prices)."""
+    if is_retry:
+        logger.info(f"Starting RETRY sync (attempt {retry_count}/{_MAX_RETRIES})")
+        _pending_retry_jobs.pop(f"sync_retry_{retry_count}", None)
+    else:
+        logger.info(f"Starting scheduled sync (source: {DATA_SOURCE})")
+
+    settings = _SETTINGS
+    sync_success = False
+
+    try:
+        await asyncio.to_thread(_run_sync_pass)
+        sync_success = True
+
+        # Alert checks and Nordic momentum both end in writes, so they
+        # run back to back on their own sessions rather than gathered:
+        # racing them only makes them contend for the write lock, and a
+        # pool timeout in the alert pass would surface as a sync failure
+        # and schedule a spurious full retry.
+        await asyncio.to_thread(_run_alert_checks, settings, is_retry)
+        await asyncio.to_thread(_run_nordic_momentum)
+
     except Exception as e:
         logger.error(f"Sync failed: {e}")
         sync_success = False
         
         # Schedule retry if not already a retry and under max retries
-        if _sync_retry_count < _MAX_RETRIES:
-            _sync_retry_count += 1
-            retry_hour = get_settings().data_sync_hour + _sync_retry_count
-            logger.warning(f"Scheduling retry #{_sync_retry_count} at hour {retry_hour}")
-            
-            # Schedule one-time retry job
-            scheduler.add_job(
-                lambda: sync_job(is_retry=True),
-                CronTrigger(hour=retry_hour, minute=0),
-                id=f"sync_retry_{_sync_retry_count}",
+        if retry_count < _MAX_RETRIES:
+            next_retry = retry_count + 1
+            # Exponential backoff (10, 20 min) with jitter so replicas
+            # don't retry in lockstep. A DateTrigger one-shot fires at the
+            # computed time directly — the old hour+N cron slot rolled past
+            # midnight for late sync hours and waited up to 24h to fire.
+            backoff = timedelta(
+                minutes=5 * (2 ** next_retry),
+                seconds=random.randint(0, 30),
+            )
+            run_date = datetime.now(timezone.utc) + backoff
+            logger.warning(f"Scheduling retry #{next_retry} at {run_date.isoformat()}")
+
+            # Schedule one-time retry job and retain a strong reference
+            retry_job = scheduler.add_job(
+                sync_job,
+                DateTrigger(run_date=run_date),
+                kwargs={"is_retry": True, "retry_count": next_retry},
+                id=f"sync_retry_{next_retry}",
                 replace_existing=True,
                 max_instances=1
             )
+            _pending_retry_jobs[retry_job.id] = retry_job
         else:
             # All retries exhausted - send critical alert
             logger.critical(f"All sync retries exhausted. Sending alert.")
             try:
-                settings = get_settings()
                 if settings.alert_email:
-                    from services.alerting import send_alert_email
                     send_alert_email(
                         [{'severity': 'CRITICAL', 'message': f'Data sync failed after {_MAX_RETRIES} retries: {e}'}],
-                        {
-                            'alert_email': settings.alert_email,
-                            'smtp_host': settings.smtp_host,
-                            'smtp_port': settings.smtp_port,
-                            'smtp_user': settings.smtp_user,
-                            'smtp_password': settings.smtp_password,
-                            'smtp_from': settings.smtp_from
-                        }
+                        _email_config(settings)
                     )
             except Exception as alert_err:
                 logger.error(f"Failed to send sync failure alert: {alert_err}")
-    finally:
-        # CRITICAL FIX: Ensure database session is properly closed
-        try:
-            db.close()
-        except Exception:
-            pass
-        
-        # Additional cleanup
-        import gc
-        gc.collect()
 
-def scan_new_stocks_job():
+async def scan_new_stocks_job():
     """Job to scan for new stocks - runs every 2 weeks at night.
     
     Also reclassifies existing stocks and runs a discovery sync
     to find fundamentals for newly discovered stocks.
     """
     logger.info("Starting scheduled stock scan for new listings")
-    db = SessionLocal()
     try:
-        from services.stock_scanner import scan_for_new_stocks, classify_stock_type
-        import sqlite3
-        
-        conn = sqlite3.connect('app.db')
-        cur = conn.cursor()
-        
-        # Step 1: Reclassify existing stocks (fast - just DB update)
-        logger.info("Reclassifying existing stocks...")
-        cur.execute("SELECT ticker, name FROM stocks WHERE stock_type = 'stock'")
-        stocks = cur.fetchall()
-        reclassified = 0
-        for ticker, name in stocks:
-            new_type = classify_stock_type(ticker, name or '')
-            if new_type != 'stock':
-                cur.execute("UPDATE stocks SET stock_type = ? WHERE ticker = ?", (new_type, ticker))
-                reclassified += 1
-        conn.commit()
-        logger.info(f"Reclassified {reclassified} stocks")
-        
-        # Step 2: Scan for new stocks (incremental - new IDs only)
-        cur.execute('SELECT MAX(CAST(avanza_id AS INTEGER)) FROM stocks WHERE avanza_id IS NOT NULL')
-        current_max = cur.fetchone()[0] or 2250000
-        conn.close()
-        
-        start_id = current_max + 1
-        end_id = current_max + 500000
-        
-        logger.info(f"Scanning new ID range: {start_id} - {end_id}")
-        result = scan_for_new_stocks(
-            ranges=[{"start": start_id, "end": end_id}],
-            max_workers=10
-        )
-        logger.info(f"Stock scan complete: {result['new_stocks_found']} new stocks found")
-        
-        # Step 3: Discovery sync - try to get fundamentals for inactive stocks
-        # This runs less frequently than daily sync but covers all stocks
-        logger.info("Running discovery sync for inactive stocks...")
-        from services.avanza_fetcher_v2 import avanza_sync
-        from services.stock_validator import mark_stocks_with_fundamentals_active
+        with session_scope() as db:
+            # Step 1: Reclassify existing stocks (fast - just DB update)
+            logger.info("Reclassifying existing stocks...")
+            rows = db.execute(text("SELECT ticker, name FROM stocks WHERE stock_type = 'stock'"))
+            # Iterate the result directly: only the (small) set of changed
+            # rows is materialized, not the whole table. Changes are then
+            # written as one executemany batch — one transaction instead of
+            # one UPDATE round-trip per row.
+            updates = [
+                {"stock_type": new_type, "ticker": ticker}
+                for ticker, name in rows
+                if (new_type := classify_stock_type(ticker, name or '')) != 'stock'
+            ]
+            if updates:
+                db.execute(
+                    text("UPDATE stocks SET stock_type = :stock_type WHERE ticker = :ticker"),
+                    updates,
+                )
+            # Commit before the long network scan below so the reclassify
+            # isn't held open in the write transaction
+            db.commit()
+            logger.info(f"Reclassified {len(updates)} stocks")
+
+            # Step 2: Scan for new stocks (incremental - new IDs only)
+            current_max = db.execute(text(
+                "SELECT MAX(CAST(avanza_id AS INTEGER)) FROM stocks WHERE avanza_id IS NOT NULL"
+            )).scalar() or 2250000
+            # The SELECT above opened a transaction; end it so the session
+            # isn't pinning a connection (and snapshot) across the
+            # multi-minute network scan below.
+            db.commit()
+
+            start_id = current_max + 1
+            end_id = current_max + 500000
+        
+            logger.info(f"Scanning new ID range: {start_id} - {end_id}")
+            # I/O-bound HTTP scan: size the pool to the host instead of a
+            # hard-coded 10 (capped so big machines don't hammer the API).
+            # Runs on a worker thread - the scan itself blocks for minutes
+            # and must not stall the event loop.
+            result = await asyncio.to_thread(
+                scan_for_new_stocks,
+                ranges=[{"start": start_id, "end": end_id}],
+                max_workers=min(32, (os.cpu_count() or 2) * 4),
+            )
+            logger.info(f"Stock scan complete: {result['new_stocks_found']} new stocks found")
         
-        # Pass tier='discovery' to sync all stocks, not just active ones
-        discovery_result = asyncio.run(avanza_sync(db, region="sweden", market_cap="large", tier='discovery'))
-        logger.info(f"Discovery sync complete: {discovery_result}")
+            # Step 3: Discovery sync - try to get fundamentals for inactive stocks
+            # This runs less frequently than daily sync but covers all stocks
+            logger.info("Running discovery sync for inactive stocks...")
+
+            # Pass tier='discovery' to sync all stocks, not just active ones
+            discovery_result = await avanza_sync(db, region="sweden", market_cap="large", tier='discovery')
+            logger.info(f"Discovery sync complete: {discovery_result}")
         
-        # Update is_active based on which stocks now have fundamentals
-        active_result = mark_stocks_with_fundamentals_active(db)
-        if active_result.get('success'):
-            logger.info(f"Updated is_active: {active_result['updated']} stocks now active")
+            # Update is_active based on which stocks now have fundamentals
+            active_result = mark_stocks_with_fundamentals_active(db)
+            if active_result.get('success'):
+                logger.info(f"Updated is_active: {active_result['updated']} stocks now active")
         
     except Exception as e:
         logger.error(f"Stock scan failed: {e}")
-    finally:
-        db.close()
 
-def send_reports_job():
+async def _send_emails_concurrently(to_email, emails, email_config):
+    """Dispatch independent SMTP sends on worker threads and wait for all:
+    wall time is the slowest round trip instead of the sum. Individual
+    failures are logged without aborting the batch."""
+    if not emails:
+        return
+    results = await asyncio.gather(
+        *(asyncio.to_thread(send_report_email, to_email, subject, body, email_config)
+          for subject, body in emails),
+        return_exceptions=True,
+    )
+    for (subject, _), result in zip(emails, results):
+        if isinstance(result, Exception):
+            logger.error(f"Report email failed ({subject}): {result}")
+
+
+async def send_reports_job():
     """Job to send email reports - runs daily, sends based on schedule."""
     logger.info("Checking for reports to send")
-    db = SessionLocal()
     try:
-        from services.email_reports import (
-            should_send_monthly_report, should_send_rebalance_reminder,
-            generate_monthly_report, generate_rebalance_report,
-            format_monthly_email, format_rebalance_email, send_report_email
-        )
-        from services.email_notifications import send_monthly_portfolio_alerts
-        from config.settings import get_settings
-        from datetime import date
+        with session_scope() as db:
+            settings = _SETTINGS
+            if not settings.alert_email:
+                logger.info("No alert_email configured, skipping reports")
+                return
         
-        settings = get_settings()
-        if not settings.alert_email:
-            logger.info("No alert_email configured, skipping reports")
-            return
-        
-        email_config = {
-            'smtp_host': settings.smtp_host,
-            'smtp_port': settings.smtp_port,
-            'smtp_user': settings.smtp_user,
-            'smtp_password': settings.smtp_password,
-            'smtp_from': settings.smtp_from
-        }
-        
-        # Monthly portfolio alerts on 1st of month - send to ALL users with top 40 + rebalance info
-        if date.today().day == 1:
-            logger.info("Sending monthly rankings emails to all users")
-            from services.email_notifications import generate_monthly_rankings_email
-            alert_result = generate_monthly_rankings_email(db)
-            logger.info(f"Monthly rankings emails: {alert_result}")
-        
-        # Monthly report on 1st of month
-        if should_send_monthly_report():
-            logger.info("Sending monthly report")
-            report = generate_monthly_report(db)
-            body = format_monthly_email(report)
-            send_report_email(settings.alert_email, "📊 Börslabbet Monthly Report", body, email_config)
-        
-        # Rebalance reminders 7 days before
-        strategies = should_send_rebalance_reminder(days_before=7)
-        for strategy in strategies:
-            logger.info(f"Sending rebalance reminder for {strategy}")
-            report = generate_rebalance_report(db, strategy)
-            body = format_rebalance_email(report, strategy)
-            send_report_email(settings.alert_email, f"🔄 Rebalance in 7 days: {strategy}", body, email_config)
-        
-        # Rebalance day reminder
-        strategies = should_send_rebalance_reminder(days_before=0)
-        for strategy in strategies:
-            logger.info(f"Sending rebalance day alert for {strategy}")
-            report = generate_rebalance_report(db, strategy)
-            body = format_rebalance_email(report, strategy)
-            send_report_email(settings.alert_email, f"🔄 REBALANCE TODAY: {strategy}", body, email_config)
-            
+            email_config = _email_config(settings)
+
+            # Report generation and SMTP round trips block, so they all go
+            # through worker threads rather than running on the event loop.
+
+            # Monthly portfolio alerts on 1st of month - send to ALL users with top 40 + rebalance info
+            if date.today().day == 1:
+                logger.info("Sending monthly rankings emails to all users")
+                alert_result = await asyncio.to_thread(generate_monthly_rankings_email, db)
+                logger.info(f"Monthly rankings emails: {alert_result}")
+
+            # Monthly report on 1st of month
+            if should_send_monthly_report():
+                logger.info("Sending monthly report")
+                report = await asyncio.to_thread(generate_monthly_report, db)
+                body = format_monthly_email(report)
+                await asyncio.to_thread(
+                    send_report_email, settings.alert_email,
+                    "📊 Börslabbet Monthly Report", body, email_config
+                )
+
+            # Rebalance reminders 7 days before and on the day itself.
+            # A strategy can appear in both lists, so each report/body is
+            # generated once per strategy and shared; only the subject
+            # differs. Reports are built serially (one shared db session),
+            # then the independent SMTP sends go out concurrently.
+            strategies_7 = should_send_rebalance_reminder(days_before=7)
+            strategies_0 = should_send_rebalance_reminder(days_before=0)
+            bodies = {}
+            for strategy in set(strategies_7) | set(strategies_0):
+                report = await asyncio.to_thread(generate_rebalance_report, db, strategy)
+                bodies[strategy] = format_rebalance_email(report, strategy)
+
+            emails = []
+            for strategy in strategies_7:
+                logger.info(f"Sending rebalance reminder for {strategy}")
+                emails.append((f"🔄 Rebalance in 7 days: {strategy}", bodies[strategy]))
+            await _send_emails_concurrently(settings.alert_email, emails, email_config)
+
+            emails = []
+            for strategy in strategies_0:
+                logger.info(f"Sending rebalance day alert for {strategy}")
+                emails.append((f"🔄 REBALANCE TODAY: {strategy}", bodies[strategy]))
+            await _send_emails_concurrently(settings.alert_email, emails, email_config)
+
+
     except Exception as e:
         logger.error(f"Report job failed: {e}")
-    finally:
-        db.close()
 
 
 def cleanup_old_data_job():
     """Weekly cleanup of logs only - prices kept for backtesting."""
     logger.info("Starting weekly cleanup")
-    db = SessionLocal()
     try:
-        from datetime import date, timedelta
-        from models import DataSyncLog
-        
-        # Only clean logs (keep 30 days) - prices needed for backtesting
-        log_cutoff = date.today() - timedelta(days=30)
-        deleted_logs = db.query(DataSyncLog).filter(DataSyncLog.started_at < log_cutoff).delete()
-        db.commit()
+        with session_scope() as db:
+            # Only clean logs (keep 30 days) - prices needed for backtesting
+            log_cutoff = date.today() - timedelta(days=30)
+            deleted_logs = db.query(SyncLog).filter(SyncLog.timestamp < log_cutoff).delete()
         
-        logger.info(f"Cleanup complete: {deleted_logs} old logs deleted")
+            logger.info(f"Cleanup complete: {deleted_logs} old logs deleted")
     except Exception as e:
         logger.error(f"Cleanup failed: {e}")
-        db.rollback()
-    finally:
-        db.close()
 
 
 def rebalance_reminder_job():
     """Send push notifications for upcoming rebalance dates based on user preferences."""
     logger.info("Checking rebalance reminders")
-    db = SessionLocal()
     try:
-        from datetime import date
-        from models import User, PushSubscription
-        from services.push_notifications import send_to_user
-        
-        today = date.today()
-        
-        # Get all users with push subscriptions
-        users_with_push = db.query(User).join(PushSubscription).distinct().all()
-        
-        for user in users_with_push:
-            freq = user.rebalance_frequency or "quarterly"
-            day = user.rebalance_day or 15
-            
-            # Determine rebalance months
-            if freq == "monthly":
-                months = list(range(1, 13))
-            else:
-                months = [3, 6, 9, 12]
-            
-            # Find next rebalance date for this user
-            for month in months:
-                year = today.year if month >= today.month else today.year + 1
-                rebalance_date = date(year, month, day)
-                if rebalance_date > today:
-                    days_until = (rebalance_date - today).days
-                    
-                    if days_until in [3, 1, 0]:
-                        if days_until == 3:
-                            title, body = "📅 Ombalansering om 3 dagar", f"Dags att förbereda din portfölj ({rebalance_date.strftime('%d %b')})"
-                        elif days_until == 1:
-                            title, body = "⏰ Ombalansering imorgon!", "Glöm inte att ombalansera din portfölj"
-                        else:
-                            title, body = "🔔 Dags att ombalansera!", "Idag är det ombalanseringsdag"
-                        
-                        sent = send_to_user(db, user.id, title, body, "/dashboard")
-                        if sent:
-                            logger.info(f"Sent reminder to user {user.id} ({days_until} days)")
-                    break  # Only check next upcoming date
+        with session_scope() as db:
+            # pywebpush is an optional dependency, so keep this import at the
+            # job level rather than module scope
+            from services.push_notifications import send_to_user
+
+            today = date.today()
+
+            # Only three dates can trigger a reminder (today, tomorrow,
+            # in 3 days), so instead of walking users × months in Python,
+            # run one filtered query per trigger date and touch only the
+            # users it matches. A rebalance date inside that window is
+            # necessarily the user's next one, so no month scan is needed.
+            quarterly_months = (3, 6, 9, 12)
+            for days_until, title in (
+                (0, "🔔 Dags att ombalansera!"),
+                (1, "⏰ Ombalansering imorgon!"),
+                (3, "📅 Ombalansering om 3 dagar"),
+            ):
+                target = today + timedelta(days=days_until)
+                if days_until == 3:
+                    body = f"Dags att förbereda din portfölj ({target.strftime('%d %b')})"
+                elif days_until == 1:
+                    body = "Glöm inte att ombalansera din portfölj"
+                else:
+                    body = "Idag är det ombalanseringsdag"
+
+                matches = db.query(User).join(PushSubscription).filter(
+                    func.coalesce(User.rebalance_day, 15) == target.day
+                )
+                if target.month not in quarterly_months:
+                    # Off-quarter months only ever match monthly users
+                    matches = matches.filter(
+                        func.coalesce(User.rebalance_frequency, "quarterly") == "monthly"
+                    )
+
+                for user in matches.distinct():
+                    sent = send_to_user(db, user.id, title, body, "/dashboard")
+                    if sent:
+                        logger.info(f"Sent reminder to user {user.id} ({days_until} days)")
                 
     except Exception as e:
         logger.error(f"Rebalance reminder job failed: {e}")
-    finally:
-        db.close()
 
 
 def start_scheduler():
     """Start the APScheduler with configured jobs."""
-    settings = get_settings()
+    settings = _SETTINGS
     
     if not settings.data_sync_enabled:
         logger.info("Data sync disabled, scheduler not started")
         return
-    
+
+    # Validate the configured hour up front: CronTrigger(hour=25) would
+    # only raise here at startup anyway, but wrap-and-warn beats crashing
+    # the whole scheduler over a typo in DATA_SYNC_HOUR
+    sync_hour = settings.data_sync_hour
+    if not 0 <= sync_hour <= 23:
+        logger.warning(f"DATA_SYNC_HOUR={sync_hour} out of range, using {sync_hour % 24}")
+        sync_hour %= 24
+
     # Daily sync at configured hour (UTC)
     scheduler.add_job(
         sync_job,
-        CronTrigger(hour=settings.data_sync_hour, minute=0),
+        CronTrigger(hour=sync_hour, minute=0),
         id="daily_sync",
-        replace_existing=True
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
     )
     
     # Bi-weekly stock scan for new listings (every other Sunday at 3 AM UTC)
@@ -586,7 +692,10 @@ def start_scheduler():
         scan_new_stocks_job,
         CronTrigger(day_of_week="sun", hour=3, minute=0, week="*/2"),
         id="biweekly_stock_scan",
-        replace_existing=True
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
     )
     
     # Daily report check at 8 AM UTC (sends monthly/rebalance emails as needed)
@@ -594,7 +703,10 @@ def start_scheduler():
         send_reports_job,
         CronTrigger(hour=8, minute=0),
         id="daily_reports",
-        replace_existing=True
+        replace_existing=True,
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
     )
     
     # Weekly cleanup on Sundays at 4 AM UTC
@@ -602,7 +714,11 @@ def start_scheduler():
         cleanup_old_data_job,
         CronTrigger(day_of_week="sun", hour=4, minute=0),
         id="weekly_cleanup",
-        replace_existing=True
+        replace_existing=True,
+        executor="threads",
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
     )
     
     # Rebalance reminder check daily at 7 AM UTC
@@ -610,11 +726,15 @@ def start_scheduler():
         rebalance_reminder_job,
         CronTrigger(hour=7, minute=0),
         id="rebalance_reminder",
-        replace_existing=True
+        replace_existing=True,
+        executor="threads",
+        max_instances=1,
+        coalesce=True,
+        misfire_grace_time=3600,
     )
     
     scheduler.start()
-    logger.info(f"Scheduler started: sync at {settings.data_sync_hour}:00, reports at 08:00, cleanup Sundays 04:00 UTC")
+    logger.info(f"Scheduler started: sync at {sync_hour}:00, reports at 08:00, cleanup Sundays 04:00 UTC")
 
 def stop_scheduler():
     """Stop the scheduler."""
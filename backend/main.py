@@ -1,18 +1,27 @@
 from fastapi import FastAPI, Depends, HTTPException, Query, WebSocket, WebSocketDisconnect, Header, UploadFile, File, Request, Response
 from pydantic import BaseModel
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from datetime import date, datetime, timedelta
+from concurrent.futures import Future, ThreadPoolExecutor
 from contextlib import asynccontextmanager
+from functools import lru_cache
+from uuid import uuid4
 import pandas as pd
 import json
 import logging
 import asyncio
 from typing import List, Dict, Optional
 
+try:
+    import orjson  # Optional: C-based JSON, much faster on small payloads
+except ImportError:
+    orjson = None
+
 # CRITICAL: Start memory monitoring immediately
 from services.memory_monitor import memory_monitor, monitor_memory_usage
 
-from db import get_db, engine, Base, text
+from db import get_db, get_read_db, engine, Base, text, warm_pools, ensure_indexes
 from models import Stock, DailyPrice, Fundamentals, SavedCombination as SavedCombinationModel, UserGoal
 # from models.user_storage import UserProfile, UserPortfolio, AvanzaImport, UserSession
 from schemas import (
@@ -118,10 +127,35 @@ manager = ConnectionManager()
 
 STRATEGIES_CONFIG = load_strategies_config()
 
+
+@lru_cache(maxsize=2)
+def _rebalance_dates_for(day: date) -> dict:
+    """Next rebalance date per strategy, cached per calendar day - the
+    result is deterministic from the static config and today's date."""
+    return get_next_rebalance_dates(STRATEGIES_CONFIG.get("strategies", {}), from_date=day)
+
+# The strategies sub-dict never changes after load; resolve it once
+# instead of a .get() per request in every endpoint
+STRATEGIES = STRATEGIES_CONFIG.get("strategies", {})
+# /strategies returns the same payload for the process lifetime
+STRATEGY_META_LIST = [
+    StrategyMeta(
+        name=name,
+        display_name=config.get("display_name", name),
+        description=config.get("description", ""),
+        type=config.get("category", "unknown"),
+        portfolio_size=config.get("position_count", 10),
+        rebalance_frequency=config.get("rebalance_frequency", "annual")
+    )
+    for name, config in STRATEGIES.items()
+]
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
-    
+    ensure_indexes()
+    warm_pools()  # Absorb connection/PRAGMA setup into boot time
+
     # CRITICAL: Start memory monitoring for production
     memory_monitor.start_monitoring(check_interval=60)  # Check every minute
     logger.info("Memory monitoring started")
@@ -201,8 +235,7 @@ class AuthMiddleware(BaseHTTPMiddleware):
         from db import SessionLocal
         from models import UserSession
         from datetime import datetime
-        db = SessionLocal()
-        try:
+        with SessionLocal() as db:
             session = db.query(UserSession).filter(
                 UserSession.token == token,
                 UserSession.expires_at > datetime.now()
@@ -210,8 +243,6 @@ class AuthMiddleware(BaseHTTPMiddleware):
             if not session:
                 from fastapi.responses import JSONResponse
                 return JSONResponse(status_code=401, content={"detail": "Session expired"})
-        finally:
-            db.close()
         
         return await call_next(request)
 
@@ -402,7 +433,7 @@ def remove_user_admin(request: Request, user_id: int, db: Session = Depends(get_
 
 # Health
 @v1_router.get("/health")
-def health_check(db: Session = Depends(get_db)):
+def health_check(db: Session = Depends(get_read_db)):
     """Health check with database connectivity."""
     try:
         db.execute(text("SELECT 1"))
@@ -419,7 +450,7 @@ def health_check(db: Session = Depends(get_db)):
 
 # Prometheus metrics endpoint
 @v1_router.get("/metrics", response_class=PlainTextResponse)
-def metrics(db: Session = Depends(get_db)):
+def metrics(db: Session = Depends(get_read_db)):
     """Prometheus-compatible metrics endpoint."""
     from models import Stock, DailyPrice, StrategySignal
     
@@ -468,7 +499,7 @@ def cleanup_memory_endpoint():
 
 # Data integrity check - CRITICAL for trading
 @v1_router.get("/data/integrity")
-def check_data_integrity_endpoint(db: Session = Depends(get_db)):
+def check_data_integrity_endpoint(db: Session = Depends(get_read_db)):
     """
     Check data integrity before trading.
     Returns comprehensive report on data freshness, coverage, and issues.
@@ -480,7 +511,7 @@ def check_data_integrity_endpoint(db: Session = Depends(get_db)):
 
 
 @v1_router.get("/data/integrity/quick")
-def quick_integrity_check(db: Session = Depends(get_db)):
+def quick_integrity_check(db: Session = Depends(get_read_db)):
     """Quick integrity check - returns just safe_to_trade boolean and critical issues."""
     from services.data_integrity import check_data_integrity
     result = check_data_integrity(db)
@@ -497,7 +528,7 @@ def quick_integrity_check(db: Session = Depends(get_db)):
 def get_alerts_history(
     limit: int = Query(50, ge=1, le=200),
     include_resolved: bool = Query(False),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     """Get historical data alerts."""
     from services.alerting import get_alert_history
@@ -848,23 +879,13 @@ def list_strategies(response: Response):
     logger.info("GET /strategies")
     # Add HTTP cache headers - strategy list rarely changes
     response.headers["Cache-Control"] = "public, max-age=3600"  # 1 hour browser cache
-    result = []
-    for name, config in STRATEGIES_CONFIG.get("strategies", {}).items():
-        result.append(StrategyMeta(
-            name=name,
-            display_name=config.get("display_name", name),
-            description=config.get("description", ""),
-            type=config.get("category", "unknown"),
-            portfolio_size=config.get("position_count", 10),
-            rebalance_frequency=config.get("rebalance_frequency", "annual")
-        ))
-    return result
+    return STRATEGY_META_LIST
 
 
 @v1_router.get("/strategies/compare")
 def compare_all_strategies(db: Session = Depends(get_db)):
     """Get top 10 from all strategies side by side."""
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     result = {}
     for name, config in strategies.items():
         try:
@@ -882,7 +903,7 @@ def get_all_strategies_performance(db: Session = Depends(get_db)):
     from services.avanza_fetcher_v2 import AvanzaDirectFetcher
     
     fetcher = AvanzaDirectFetcher()
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     results = []
     
     for name, config in strategies.items():
@@ -930,7 +951,7 @@ def get_all_strategies_performance(db: Session = Depends(get_db)):
 @v1_router.get("/strategies/{name}", response_model=list[RankedStock])
 def get_strategy_rankings(name: str, response: Response, db: Session = Depends(get_db)):
     logger.info(f"GET /strategies/{name}")
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if name not in strategies:
         raise HTTPException(status_code=404, detail=f"Strategy '{name}' not found")
     
@@ -950,7 +971,7 @@ def get_strategy_rankings(name: str, response: Response, db: Session = Depends(g
 @v1_router.get("/strategies/{name}/top10", response_model=list[RankedStock])
 def get_strategy_top10(name: str, response: Response, db: Session = Depends(get_db)):
     logger.info(f"GET /strategies/{name}/top10")
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if name not in strategies:
         raise HTTPException(status_code=404, detail=f"Strategy '{name}' not found")
     
@@ -1146,14 +1167,15 @@ def check_momentum_banding(
             return actual_ticker, rank_map[actual_ticker]
         return ticker, None
     
+    name_map = _load_stock_name_map(db)
     for ticker in holdings:
         actual_ticker, info = lookup_ticker(ticker)
         if info is None:
             sells.append({"ticker": ticker, "rank": None, "name": None, "reason": "Not in universe"})
         elif info["rank"] > sell_threshold:
-            sells.append({"ticker": actual_ticker, "rank": info["rank"], "name": _get_stock_name(actual_ticker, db), "reason": f"Below top 20% (rank {info['rank']})"})
+            sells.append({"ticker": actual_ticker, "rank": info["rank"], "name": name_map.get(actual_ticker), "reason": f"Below top 20% (rank {info['rank']})"})
         else:
-            name = _get_stock_name(actual_ticker, db)
+            name = name_map.get(actual_ticker)
             entry = {"ticker": actual_ticker, "rank": info["rank"], "name": name}
             keeps.append(entry)
             if info["rank"] > buy_threshold:
@@ -1165,7 +1187,7 @@ def check_momentum_banding(
     slots_needed = max(0, 10 - len(keeps))
     for r in ranked_data[:buy_threshold]:
         if normalize_ticker(r['ticker']) not in owned_normalized and len(buys) < slots_needed:
-            buys.append({"ticker": r['ticker'], "rank": r['rank'], "name": _get_stock_name(r['ticker'], db)})
+            buys.append({"ticker": r['ticker'], "rank": r['rank'], "name": name_map.get(r['ticker'])})
     
     return {
         "keeps": sorted(keeps, key=lambda x: x["rank"]),
@@ -1241,7 +1263,7 @@ def get_investment_suggestion(req: InvestmentRequest, db: Session = Depends(get_
     """
     logger.info(f"POST /portfolio/investment-suggestion: {req.amount} SEK, {req.strategies}, mode={req.mode}")
     
-    strategies_config = STRATEGIES_CONFIG.get("strategies", {})
+    strategies_config = STRATEGIES
     
     # Get rankings for each selected strategy
     all_picks = []
@@ -1414,43 +1436,28 @@ def get_portfolio_sverige(db: Session = Depends(get_db)):
     logger.info("GET /portfolio/sverige")
     portfolio_config = STRATEGIES_CONFIG.get("portfolio_sverige", {})
     strategy_names = portfolio_config.get("strategies", [])
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     
     strategy_results = {}
     for name in strategy_names:
         if name in strategies:
             rankings = _compute_strategy_rankings(name, strategies[name], db)
-            
-            # CRITICAL FIX: Memory-optimized DataFrame creation
-            if rankings:
-                # Create DataFrame in chunks to prevent memory spikes
-                ranking_data = [r.model_dump() for r in rankings]
-                strategy_results[name] = pd.DataFrame(ranking_data)
-                
-                # Apply memory optimization
-                from services.memory_optimizer import MemoryOptimizer
-                strategy_results[name] = MemoryOptimizer.optimize_dtypes(strategy_results[name])
-                
-                # Clean up
-                del ranking_data, rankings
-                import gc
-                gc.collect()
-            else:
-                strategy_results[name] = pd.DataFrame()
+            strategy_results[name] = [r.ticker for r in rankings]
     
     combined = combine_strategies(strategy_results)
     # CRITICAL FIX: Use vectorized operations instead of memory-intensive iterrows()
+    name_map = _load_stock_name_map(db)
     holdings = []
     for idx in range(len(combined)):
         row = combined.iloc[idx]
         holdings.append(PortfolioHoldingOut(
-            ticker=row['ticker'], 
-            name=_get_stock_name(row['ticker'], db),
+            ticker=row['ticker'],
+            name=name_map.get(row['ticker']),
             weight=row['weight'], 
             strategy=row['strategy']
         ))
     
-    rebalance_dates = get_next_rebalance_dates(strategies)
+    rebalance_dates = _rebalance_dates_for(date.today())
     next_rebalance = min(rebalance_dates.values()) if rebalance_dates else None
     
     return PortfolioResponse(holdings=holdings, as_of_date=date.today(), next_rebalance_date=next_rebalance)
@@ -1459,85 +1466,58 @@ def get_portfolio_sverige(db: Session = Depends(get_db)):
 @v1_router.get("/portfolio/rebalance-dates", response_model=list[RebalanceDate])
 def get_rebalance_dates_endpoint():
     logger.info("GET /portfolio/rebalance-dates")
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
-    dates = get_next_rebalance_dates(strategies)
+    dates = _rebalance_dates_for(date.today())
     return [RebalanceDate(strategy_name=name, next_date=d) for name, d in dates.items()]
 
 
 @v1_router.post("/portfolio/combiner", response_model=PortfolioResponse)
 def combine_portfolio(request: CombinerRequest, db: Session = Depends(get_db)):
     logger.info(f"POST /portfolio/combiner: {request.strategies}")
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     
     strategy_results = {}
     for name in request.strategies:
         if name in strategies:
             rankings = _compute_strategy_rankings(name, strategies[name], db)
-            # CRITICAL FIX: Memory-optimized DataFrame creation
-            if rankings:
-                ranking_data = [r.model_dump() for r in rankings]
-                strategy_results[name] = pd.DataFrame(ranking_data)
-                
-                # Apply memory optimization
-                from services.memory_optimizer import MemoryOptimizer
-                strategy_results[name] = MemoryOptimizer.optimize_dtypes(strategy_results[name])
-                
-                # Clean up
-                del ranking_data, rankings
-                import gc
-                gc.collect()
-            else:
-                strategy_results[name] = pd.DataFrame()
+            strategy_results[name] = [r.ticker for r in rankings]
     
     combined = combine_strategies(strategy_results)
+    name_map = _load_stock_name_map(db)
     holdings = [
-        PortfolioHoldingOut(ticker=row['ticker'], name=_get_stock_name(row['ticker'], db),
+        PortfolioHoldingOut(ticker=row['ticker'], name=name_map.get(row['ticker']),
                            weight=row['weight'], strategy=row['strategy'])
         for _, row in combined.iterrows()
     ]
-    
+
     return PortfolioResponse(holdings=holdings, as_of_date=date.today(), next_rebalance_date=None)
 
 
 @v1_router.post("/portfolio/combiner/preview", response_model=CombinerPreviewResponse)
 def preview_combination(request: CombinerPreviewRequest, db: Session = Depends(get_db)):
     logger.info(f"POST /portfolio/combiner/preview: {request.name}")
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     
     strategy_results = {}
     for sw in request.strategies:
         if sw.name in strategies:
             rankings = _compute_strategy_rankings(sw.name, strategies[sw.name], db)
-            # CRITICAL FIX: Memory-optimized DataFrame creation
-            if rankings:
-                ranking_data = [r.model_dump() for r in rankings]
-                strategy_results[sw.name] = pd.DataFrame(ranking_data)
-                
-                # Apply memory optimization
-                from services.memory_optimizer import MemoryOptimizer
-                strategy_results[sw.name] = MemoryOptimizer.optimize_dtypes(strategy_results[sw.name])
-                
-                # Clean up
-                del ranking_data, rankings
-                import gc
-                gc.collect()
-            else:
-                strategy_results[sw.name] = pd.DataFrame()
+            strategy_results[sw.name] = [r.ticker for r in rankings]
     
     combined = combine_strategies(strategy_results)
+    name_map = _load_stock_name_map(db)
     holdings = [
-        PortfolioHoldingOut(ticker=row['ticker'], name=_get_stock_name(row['ticker'], db),
+        PortfolioHoldingOut(ticker=row['ticker'], name=name_map.get(row['ticker']),
                            weight=row['weight'], strategy=row['strategy'])
         for _, row in combined.iterrows()
     ]
-    
-    # Find overlaps
-    ticker_counts = {}
-    for h in holdings:
-        ticker_counts[h.ticker] = ticker_counts.get(h.ticker, 0) + 1
+
+    # Find overlaps - one Counter pass gives both the counts and the
+    # number of distinct tickers
+    from collections import Counter
+    ticker_counts = Counter(h.ticker for h in holdings)
     overlaps = [t for t, c in ticker_counts.items() if c > 1]
-    
-    return CombinerPreviewResponse(total_stocks=len(set(h.ticker for h in holdings)),
+
+    return CombinerPreviewResponse(total_stocks=len(ticker_counts),
                                    holdings=holdings, overlaps=overlaps)
 
 
@@ -1549,21 +1529,20 @@ def save_combination(request: Request, body: CombinerSaveRequest, db: Session =
     if not user:
         raise HTTPException(status_code=401, detail="Authentication required")
     
-    # Check for duplicate name within user's combinations
-    existing = db.query(SavedCombinationModel).filter(
-        SavedCombinationModel.name == body.name,
-        SavedCombinationModel.user_id == user.id
-    ).first()
-    if existing:
-        raise HTTPException(status_code=400, detail=f"Combination '{body.name}' already exists")
-    
+    # Let the (name, user_id) unique constraint catch duplicates: one
+    # round trip instead of SELECT-then-INSERT, and no race between the
+    # check and the insert
     combo = SavedCombinationModel(
         name=body.name,
         user_id=user.id,
         strategies_json=json.dumps([{"name": s.name, "weight": s.weight} for s in body.strategies])
     )
     db.add(combo)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=f"Combination '{body.name}' already exists")
     db.refresh(combo)
     
     return SavedCombination(id=combo.id, name=combo.name, strategies=body.strategies,
@@ -1571,7 +1550,7 @@ def save_combination(request: Request, body: CombinerSaveRequest, db: Session =
 
 
 @v1_router.get("/portfolio/combiner/list", response_model=list[SavedCombination])
-def list_combinations(request: Request, db: Session = Depends(get_db)):
+def list_combinations(request: Request, db: Session = Depends(get_read_db)):
     logger.info("GET /portfolio/combiner/list")
     from services.auth import get_user_from_cookie
     user = get_user_from_cookie(request, db)
@@ -1585,10 +1564,11 @@ def list_combinations(request: Request, db: Session = Depends(get_db)):
     
     combos = query.all()
     from schemas import StrategyWeight
+    loads = orjson.loads if orjson is not None else json.loads
     return [
         SavedCombination(
             id=c.id, name=c.name,
-            strategies=[StrategyWeight(**s) for s in json.loads(c.strategies_json)],
+            strategies=[StrategyWeight(**s) for s in loads(c.strategies_json)],
             created_at=c.created_at.isoformat()
         )
         for c in combos
@@ -2076,7 +2056,7 @@ def get_drawdown_periods(strategy: str, db: Session = Depends(get_db)):
 
 def _get_strategy_rankings(strategy: str, db: Session):
     """Helper to get strategy rankings using existing compute function."""
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if strategy not in strategies:
         return []
     return _compute_strategy_rankings(strategy, strategies[strategy], db)
@@ -2084,7 +2064,7 @@ def _get_strategy_rankings(strategy: str, db: Session):
 
 # Stocks
 @v1_router.get("/stocks/{ticker}", response_model=StockDetail)
-def get_stock_detail(ticker: str, refresh: bool = False, db: Session = Depends(get_db)):
+def get_stock_detail(ticker: str, refresh: bool = False, db: Session = Depends(get_read_db)):
     """Get stock details. Use refresh=true to bypass cache and fetch fresh data."""
     logger.info(f"GET /stocks/{ticker} (refresh={refresh})")
     stock = db.query(Stock).filter(Stock.ticker == ticker).first()
@@ -2092,8 +2072,12 @@ def get_stock_detail(ticker: str, refresh: bool = False, db: Session = Depends(g
         raise HTTPException(status_code=404, detail=f"Stock '{ticker}' not found")
     
     fundamentals = db.query(Fundamentals).filter(Fundamentals.ticker == ticker).order_by(Fundamentals.fiscal_date.desc()).first()
-    prices = db.query(DailyPrice).filter(DailyPrice.ticker == ticker).order_by(DailyPrice.date.desc()).limit(252).all()
-    returns = _calculate_returns(prices)
+    # Scalar close column only - no DailyPrice ORM rows just to read .close.
+    # 253 rows so the 252-trading-day offset for the 12m return exists.
+    closes = [c for (c,) in db.query(DailyPrice.close).filter(
+        DailyPrice.ticker == ticker
+    ).order_by(DailyPrice.date.desc()).limit(253)]
+    returns = _calculate_returns(closes)
     
     return StockDetail(
         ticker=stock.ticker, name=stock.name, market_cap_msek=stock.market_cap_msek, sector=stock.sector,
@@ -2107,10 +2091,12 @@ def get_stock_detail(ticker: str, refresh: bool = False, db: Session = Depends(g
 
 
 @v1_router.get("/stocks/{ticker}/prices")
-def get_stock_prices(ticker: str, days: int = 252, db: Session = Depends(get_db)):
+def get_stock_prices(ticker: str, days: int = 252, db: Session = Depends(get_read_db)):
     """Get historical prices for a stock."""
-    prices = db.query(DailyPrice).filter(DailyPrice.ticker == ticker).order_by(DailyPrice.date.desc()).limit(days).all()
-    return {"prices": [{"date": p.date.isoformat(), "close": p.close} for p in reversed(prices)]}
+    rows = db.query(DailyPrice.date, DailyPrice.close).filter(
+        DailyPrice.ticker == ticker
+    ).order_by(DailyPrice.date.desc()).limit(days).all()
+    return {"prices": [{"date": d.isoformat(), "close": c} for d, c in reversed(rows)]}
 
 
 # Backtesting
@@ -2124,7 +2110,7 @@ def get_backtesting_strategies():
 @limiter.limit("10/minute")
 def run_strategy_backtest(request: Request, body: BacktestRequest, db: Session = Depends(get_db)):
     logger.info(f"POST /backtesting/run: {body.strategy_name} {body.start_date} to {body.end_date}")
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if body.strategy_name not in strategies:
         raise HTTPException(status_code=404, detail=f"Strategy '{body.strategy_name}' not found")
     
@@ -2157,7 +2143,7 @@ def run_strategy_backtest(request: Request, body: BacktestRequest, db: Session =
 
 
 @v1_router.get("/backtesting/results/{strategy}")
-def get_strategy_backtest_results(strategy: str, db: Session = Depends(get_db)):
+def get_strategy_backtest_results(strategy: str, db: Session = Depends(get_read_db)):
     logger.info(f"GET /backtesting/results/{strategy}")
     return get_backtest_results(db, strategy)
 
@@ -2282,33 +2268,31 @@ def run_historical_backtest_endpoint(
     
     logger.info(f"POST /backtesting/historical: {strategy_name} {start_year}-{end_year}")
     
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if strategy_name not in strategies:
         raise HTTPException(status_code=404, detail=f"Strategy '{strategy_name}' not found")
     
     start_date = date(start_year, 1, 1)
     end_date = date(end_year, 12, 31)
     
-    # Try to get real data first
-    prices = db.query(DailyPrice).filter(
-        DailyPrice.date >= start_date,
-        DailyPrice.date <= end_date
-    ).all()
-    
-    if prices and len(prices) > 1000:
+    # Try to get real data first. A 20-year window can hold millions of
+    # price rows; read_sql fills the DataFrame straight from the cursor
+    # instead of hydrating an ORM object per row and re-walking the list.
+    prices_df = pd.read_sql_query(
+        text("SELECT ticker, date, close FROM daily_prices "
+             "WHERE date BETWEEN :start AND :end"),
+        db.connection(),
+        params={"start": start_date, "end": end_date},
+        parse_dates=["date"],
+    )
+
+    if len(prices_df) > 1000:
         # Use real data
-        prices_df = pd.DataFrame([{
-            'ticker': p.ticker, 'date': p.date, 'close': p.close
-        } for p in prices])
-        
-        fundamentals = db.query(Fundamentals).all()
-        fund_df = pd.DataFrame([{
-            'ticker': f.ticker, 'fiscal_date': f.fiscal_date,
-            'pe': f.pe, 'pb': f.pb, 'ps': f.ps, 'ev_ebitda': f.ev_ebitda,
-            'roe': f.roe, 'roa': f.roa, 'roic': f.roic, 'fcfroe': f.fcfroe,
-            'dividend_yield': f.dividend_yield, 'payout_ratio': f.payout_ratio
-        } for f in fundamentals]) if fundamentals else pd.DataFrame()
-        
+        fund_df = pd.read_sql_query(
+            text("SELECT ticker, fiscal_date, pe, pb, ps, ev_ebitda, roe, roa, "
+                 "roic, fcfroe, dividend_yield, payout_ratio FROM fundamentals"),
+            db.connection(),
+        )
         data_source = "real"
     elif use_synthetic:
         # Generate synthetic data
@@ -2331,32 +2315,69 @@ def run_historical_backtest_endpoint(
     return result
 
 
-@v1_router.post("/backtesting/historical/compare")
-def compare_all_strategies_historical(
-    start_year: int = 2005,
-    end_year: int = 2024,
-    db: Session = Depends(get_db)
-):
-    """Compare all strategies over a long historical period."""
+# Long-running compare backtests can outlive HTTP timeouts; jobs submitted
+# with wait=false run on this pool and are polled by id
+_compare_backtest_pool = ThreadPoolExecutor(max_workers=2)
+_compare_backtest_jobs: dict[str, Future] = {}
+
+
+def _run_compare_backtest(start_year: int, end_year: int):
+    """Synthetic-data comparison backtest across all strategies."""
     from services.historical_backtest import run_all_strategies_backtest, generate_synthetic_history
     from services.live_universe import get_live_stock_universe
-    
-    logger.info(f"POST /backtesting/historical/compare: {start_year}-{end_year}")
-    
+
     start_date = date(start_year, 1, 1)
     end_date = date(end_year, 12, 31)
-    
-    # Generate synthetic data for comparison
+
     tickers = get_live_stock_universe('sweden', 'large')
     prices_df, fund_df = generate_synthetic_history(tickers, start_date, end_date)
-    
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
-    
+
     return run_all_strategies_backtest(
-        start_date, end_date, strategies, prices_df, fund_df
+        start_date, end_date, STRATEGIES, prices_df, fund_df
     )
 
 
+@v1_router.post("/backtesting/historical/compare")
+def compare_all_strategies_historical(
+    start_year: int = 2005,
+    end_year: int = 2024,
+    wait: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Compare all strategies over a long historical period.
+
+    With wait=false the work is submitted to a background pool and a
+    job id is returned immediately; poll /backtesting/historical/compare/{job_id}.
+    """
+    logger.info(f"POST /backtesting/historical/compare: {start_year}-{end_year} wait={wait}")
+
+    if wait:
+        return _run_compare_backtest(start_year, end_year)
+
+    job_id = uuid4().hex
+    _compare_backtest_jobs[job_id] = _compare_backtest_pool.submit(
+        _run_compare_backtest, start_year, end_year
+    )
+    return {"job_id": job_id, "status": "running"}
+
+
+@v1_router.get("/backtesting/historical/compare/{job_id}")
+def get_compare_backtest_job(job_id: str):
+    """Poll a compare backtest submitted with wait=false."""
+    future = _compare_backtest_jobs.get(job_id)
+    if future is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job '{job_id}'")
+    if not future.done():
+        return {"job_id": job_id, "status": "running"}
+    # Completed or failed: the job is consumed either way
+    del _compare_backtest_jobs[job_id]
+    error = future.exception()
+    if error is not None:
+        logger.error(f"Compare backtest job {job_id} failed: {error}")
+        return {"job_id": job_id, "status": "failed", "error": str(error)}
+    return {"job_id": job_id, "status": "completed", "result": future.result()}
+
+
 # Data Sync
 @v1_router.get("/data/sync-history")
 def get_sync_history(
@@ -2411,7 +2432,7 @@ def get_sync_history(
 
 
 @v1_router.get("/data/sync-status", response_model=SyncStatus)
-def get_data_sync_status(db: Session = Depends(get_db)):
+def get_data_sync_status(db: Session = Depends(get_read_db)):
     """Get sync status from database."""
     logger.info("GET /data/sync-status")
     from models import Stock, DailyPrice, Fundamentals
@@ -2456,6 +2477,10 @@ async def trigger_data_sync(
     deleted = db.query(BacktestResult).delete()
     db.commit()
     logger.info(f"Cleared {deleted} cached backtest results after manual sync")
+
+    # Drop memoized rankings too - the data version they were keyed on
+    # just changed
+    invalidate_cache("strategy_rankings")
     
     # Add investment safeguards
     from services.investment_safeguards import add_investment_safeguards_to_response
@@ -2566,7 +2591,7 @@ async def sync_omxs30(db: Session = Depends(get_db)):
     return result
 
 @v1_router.get("/data/omxs30")
-def get_omxs30_data(db: Session = Depends(get_db), limit: int = 100):
+def get_omxs30_data(db: Session = Depends(get_read_db), limit: int = 100):
     """Get OMXS30 index historical prices."""
     from models import IndexPrice
     prices = db.query(IndexPrice).filter(
@@ -3079,7 +3104,34 @@ def clear_all_caches():
 
 
 # Helper functions
+def _data_version(db: Session) -> tuple:
+    """Cheap freshness probe for the ranking cache: rankings can only
+    change when new daily prices or fundamentals land."""
+    from sqlalchemy import func
+    return (
+        db.query(func.max(DailyPrice.date)).scalar(),
+        db.query(func.max(Fundamentals.fetched_date)).scalar(),
+    )
+
+
 def _compute_strategy_rankings(name: str, config: dict, db: Session, include_etfs: bool = False) -> list[RankedStock]:
+    """Compute strategy rankings, memoized per (strategy, data version).
+
+    The portfolio and combiner endpoints request the same strategies on
+    every call; recomputing is pointless until a sync writes new prices
+    or fundamentals, so hits are served from the in-process cache."""
+    from services.cache import get_cached, set_cached
+
+    version = _data_version(db)
+    key = f"strategy_rankings:{name}:{include_etfs}:{version[0]}:{version[1]}"
+    result = get_cached(key)
+    if result is None:
+        result = _compute_strategy_rankings_uncached(name, config, db, include_etfs)
+        set_cached(key, result)
+    return result
+
+
+def _compute_strategy_rankings_uncached(name: str, config: dict, db: Session, include_etfs: bool = False) -> list[RankedStock]:
     """Compute strategy rankings - checks DB cache first, computes if stale."""
     from models import StrategySignal
     
@@ -3091,10 +3143,11 @@ def _compute_strategy_rankings(name: str, config: dict, db: Session, include_etf
     
     if latest:
         logger.info(f"Using cached rankings for {name} ({len(latest)} stocks)")
+        name_map = _load_stock_name_map(db)
         return [
             RankedStock(
                 ticker=s.ticker,
-                name=_get_stock_name(s.ticker, db),
+                name=name_map.get(s.ticker),
                 rank=s.rank,
                 score=s.score,
                 last_updated=date.today().isoformat(),
@@ -3106,23 +3159,35 @@ def _compute_strategy_rankings(name: str, config: dict, db: Session, include_etf
     # Compute fresh rankings
     logger.info(f"Computing fresh rankings for {name}")
     
-    # Support both old ("type") and new ("category") config keys
+    # Support both old ("type") and new ("category") config keys.
+    # Validate before touching the data: an unknown type previously paid
+    # the full price/fundamentals load just to raise a 400. All known
+    # types need both frames (the value/dividend/quality variants sort
+    # by 6m price momentum), so there is no per-type column trimming.
     strategy_type = config.get("category", config.get("type", ""))
-    
+    if strategy_type not in ("momentum", "value", "dividend", "quality"):
+        raise HTTPException(status_code=400, detail=f"Unknown strategy type: {strategy_type}")
+
     # CRITICAL FIX: Load only recent prices (last 400 days) to prevent memory exhaustion
-    # Full history is 2.3M rows (~690MB) - loading all would exhaust 4GB RAM
+    # Full history is 2.3M rows (~690MB) - loading all would exhaust 4GB RAM.
+    # read_sql with an explicit column projection goes straight into the
+    # DataFrame: no ORM row objects and no intermediate list of dicts.
     cutoff_date = date.today() - timedelta(days=400)
-    prices = db.query(DailyPrice).filter(DailyPrice.date >= cutoff_date).all()
+    prices_df = pd.read_sql_query(
+        text("SELECT ticker, date, close FROM daily_prices WHERE date >= :cutoff"),
+        db.connection(),
+        params={"cutoff": cutoff_date},
+        parse_dates=["date"],
+    )
     fundamentals = db.query(Fundamentals).all()
     stocks = db.query(Stock).all()
-    
-    logger.info(f"Loaded {len(prices)} price records (last 400 days), {len(fundamentals)} fundamentals")
-    
+
+    logger.info(f"Loaded {len(prices_df)} price records (last 400 days), {len(fundamentals)} fundamentals")
+
     # Build lookups
     market_caps = {s.ticker: s.market_cap_msek or 0 for s in stocks}
     stock_types = {s.ticker: getattr(s, 'stock_type', 'stock') for s in stocks}
-    
-    prices_df = pd.DataFrame([{"ticker": p.ticker, "date": p.date, "close": p.close} for p in prices]) if prices else pd.DataFrame()
+
     fund_df = pd.DataFrame([{
         "ticker": f.ticker, "pe": f.pe, "pb": f.pb, "ps": f.ps, "p_fcf": f.p_fcf, "ev_ebitda": f.ev_ebitda,
         "dividend_yield": f.dividend_yield, "roe": f.roe, "roa": f.roa, "roic": f.roic, "fcfroe": f.fcfroe, 
@@ -3131,10 +3196,10 @@ def _compute_strategy_rankings(name: str, config: dict, db: Session, include_etf
     } for f in fundamentals]) if fundamentals else pd.DataFrame()
     
     # Free memory from raw query results
-    del prices, fundamentals, stocks
+    del fundamentals, stocks
     import gc
     gc.collect()
-    
+
     # Filter out ETFs/certificates by default
     from services.ranking import filter_by_min_market_cap, filter_real_stocks
     if not fund_df.empty and not include_etfs:
@@ -3161,23 +3226,22 @@ def _compute_strategy_rankings(name: str, config: dict, db: Session, include_etf
     elif strategy_type == "dividend":
         if fund_df.empty: return []
         ranked_df = calculate_dividend_score(fund_df, prices_df)
-    elif strategy_type == "quality":
+    else:  # quality (type validated above)
         if fund_df.empty: return []
         ranked_df = calculate_quality_score(fund_df, prices_df)
-    else:
-        raise HTTPException(status_code=400, detail=f"Unknown strategy type: {strategy_type}")
     
     # Add data freshness to each stock in response
+    name_map = _load_stock_name_map(db)
     stocks_with_freshness = []
     for _, row in ranked_df.iterrows():
         # Get last update time for this stock
         fund = db.query(Fundamentals).filter(
             Fundamentals.ticker == row['ticker']
         ).order_by(Fundamentals.fetched_date.desc()).first()
-        
+
         stock_data = {
             'ticker': row['ticker'],
-            'name': _get_stock_name(row['ticker'], db),
+            'name': name_map.get(row['ticker']),
             'rank': int(row['rank']),
             'score': float(row['score'])
         }
@@ -3217,19 +3281,33 @@ def _compute_strategy_rankings(name: str, config: dict, db: Session, include_etf
     return stocks_with_freshness
 
 
-def _get_stock_name(ticker: str, db: Session):
-    stock = db.query(Stock).filter(Stock.ticker == ticker).first()
-    return stock.name if stock else None
+# (data version, {ticker: name}) - the stock universe only changes on
+# sync, so the full map is kept in process memory between requests
+_stock_name_cache: Optional[tuple] = None
+
+
+def _load_stock_name_map(db: Session) -> dict:
+    """All ticker→name pairs, cached in-process per data version.
+
+    Steady-state calls cost two scalar MAX probes instead of a
+    full-table fetch; the cache refreshes itself when a sync moves the
+    data version (same key the ranking memoization uses)."""
+    global _stock_name_cache
+    version = _data_version(db)
+    if _stock_name_cache is None or _stock_name_cache[0] != version:
+        _stock_name_cache = (version, dict(db.query(Stock.ticker, Stock.name)))
+    return _stock_name_cache[1]
 
 
-def _calculate_returns(prices: list[DailyPrice]) -> dict:
-    if not prices or len(prices) < 2:
+def _calculate_returns(closes: list[float]) -> dict:
+    """Trailing returns from a newest-first sequence of close prices."""
+    if not closes or len(closes) < 2:
         return {}
-    current = prices[0].close
+    current = closes[0]
     returns = {}
     for days, key in [(21, "return_1m"), (63, "return_3m"), (126, "return_6m"), (252, "return_12m")]:
-        if len(prices) > days and prices[days].close:
-            returns[key] = (current - prices[days].close) / prices[days].close if prices[days].close else None
+        if len(closes) > days and closes[days]:
+            returns[key] = (current - closes[days]) / closes[days]
     return returns
 
 
@@ -3295,14 +3373,14 @@ def export_analytics(strategy_name: str, db: Session = Depends(get_db)):
 
 # Alerts
 @v1_router.get("/alerts", operation_id="get_all_alerts")
-def get_alerts(db: Session = Depends(get_db)):
+def get_alerts(db: Session = Depends(get_read_db)):
     """Get all active alerts - rebalancing, volatility, milestones."""
     from services.alerts import get_all_alerts
     return get_all_alerts(db)
 
 
 @v1_router.get("/alerts/rebalancing")
-def get_rebalancing_alerts(db: Session = Depends(get_db)):
+def get_rebalancing_alerts(db: Session = Depends(get_read_db)):
     """Get rebalancing reminder alerts."""
     from services.alerts import check_rebalancing_alerts
     return {"alerts": check_rebalancing_alerts(db)}
@@ -4144,7 +4222,7 @@ def generate_rebalance_trades(
     current_holdings: [{"ticker": "VOLV-B.ST", "shares": 10, "value": 5000}, ...]
     """
     # Get target stocks from strategy
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if strategy not in strategies:
         raise HTTPException(status_code=404, detail=f"Strategy '{strategy}' not found")
     
@@ -4284,7 +4362,7 @@ def check_portfolio_divergence(strategy: str, holdings: List[dict], db: Session
     holdings: [{"ticker": "VOLV-B", "value": 10000}, ...]
     Returns: which stocks to add/remove, drift percentage
     """
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if strategy not in strategies:
         raise HTTPException(status_code=404, detail=f"Strategy '{strategy}' not found")
     
@@ -5110,7 +5188,7 @@ def get_portfolio_performance_data(
 
 
 @v1_router.get("/isin-lookup")
-def get_isin_lookup(db: Session = Depends(get_db)):
+def get_isin_lookup(db: Session = Depends(get_read_db)):
     """Get ISIN lookup table for client-side matching."""
     from models import IsinLookup
     
@@ -5247,7 +5325,7 @@ def save_rankings_snapshot(strategy: str, db: Session = Depends(get_db)):
     from models import RankingsSnapshot
     import json
     
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if strategy not in strategies:
         raise HTTPException(status_code=404, detail=f"Strategy '{strategy}' not found")
     
@@ -5265,7 +5343,7 @@ def save_rankings_snapshot(strategy: str, db: Session = Depends(get_db)):
 
 
 @v1_router.get("/rankings/history/{strategy}")
-def get_rankings_history(strategy: str, limit: int = 12, db: Session = Depends(get_db)):
+def get_rankings_history(strategy: str, limit: int = 12, db: Session = Depends(get_read_db)):
     """Get historical rankings snapshots."""
     from models import RankingsSnapshot
     import json
@@ -5281,7 +5359,7 @@ def get_rankings_history(strategy: str, limit: int = 12, db: Session = Depends(g
 
 
 @v1_router.get("/rankings/on-date")
-def get_rankings_on_date(strategy: str, target_date: str, db: Session = Depends(get_db)):
+def get_rankings_on_date(strategy: str, target_date: str, db: Session = Depends(get_read_db)):
     """Get rankings for a specific date (nearest snapshot)."""
     from models import RankingsSnapshot
     import json
@@ -5358,7 +5436,7 @@ def compute_historical_rankings(strategy: str, target_date: str, db: Session = D
     filtered_fund = filter_financial_companies(filtered_fund)
     
     # Compute rankings based on strategy type
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     if strategy not in strategies:
         return {"error": f"Unknown strategy: {strategy}"}
     
@@ -5484,7 +5562,7 @@ def send_rebalance_reminder_endpoint(email: str, strategy: str, db: Session = De
         return {"sent": False, "reason": "No upcoming rebalance for this strategy"}
     
     # Get current top stocks
-    strategies = STRATEGIES_CONFIG.get("strategies", {})
+    strategies = STRATEGIES
     strategy_key = next((k for k in strategies if k.lower() == strategy.lower()), None)
     stocks = []
     if strategy_key:
@@ -58,7 +58,7 @@ class Stock(Base):
     market = Column(String, default="stockholmsborsen")  # stockholmsborsen, first_north, helsinki, oslo, copenhagen
     country = Column(String, default="sweden")  # sweden, finland, norway, denmark
     currency = Column(String, default="SEK")  # SEK, EUR, NOK, DKK
-    stock_type = Column(String, default="stock")  # stock, etf_certificate, preference, sdb
+    stock_type = Column(String, default="stock", index=True)  # stock, etf_certificate, preference, sdb
     is_active = Column(Boolean, default=True)  # False if delisted or no longer on Avanza
     last_validated = Column(Date)  # Last time we verified stock exists on Avanza
     last_updated = Column(DateTime, default=func.now(), onupdate=func.now())
@@ -119,6 +119,10 @@ class Fundamentals(Base):
     piotroski_f_score = Column(Integer)
     # Data source tracking
     data_source = Column(String, default='avanza')
+    # One row per (ticker, source); the sync bulk-UPSERT conflicts on this
+    __table_args__ = (
+        UniqueConstraint('ticker', 'data_source', name='uq_fundamentals_ticker_source'),
+    )
 
 class StrategySignal(Base):
     __tablename__ = "strategy_signals"
@@ -10,15 +10,21 @@ logger = logging.getLogger(__name__)
 
 
 def check_and_create_alerts(db) -> Dict:
-    """Run integrity checks and create alerts for any issues found."""
+    """Run integrity checks and create alerts for any issues found.
+
+    The critical alerts created here are returned under
+    'unnotified_critical' (same shape as get_unnotified_critical_alerts)
+    so callers can email a digest without re-querying the alerts table.
+    """
     from services.data_integrity import DataIntegrityChecker
     from models import DataAlert
-    
+
     checker = DataIntegrityChecker(db)
     result = checker.run_all_checks()
-    
+
     alerts_created = []
-    
+    created_rows = []
+
     # Create alerts for critical issues
     for issue in result.get('issues', []):
         alert = DataAlert(
@@ -28,8 +34,9 @@ def check_and_create_alerts(db) -> Dict:
             details_json=json.dumps(issue)
         )
         db.add(alert)
+        created_rows.append(alert)
         alerts_created.append({'severity': 'CRITICAL', 'type': issue.get('type')})
-    
+
     # Create alerts for warnings
     for warning in result.get('warnings', []):
         alert = DataAlert(
@@ -39,15 +46,21 @@ def check_and_create_alerts(db) -> Dict:
             details_json=json.dumps(warning)
         )
         db.add(alert)
+        created_rows.append(alert)
         alerts_created.append({'severity': 'WARNING', 'type': warning.get('type')})
-    
+
     if alerts_created:
         db.commit()
         logger.info(f"Created {len(alerts_created)} alerts")
-    
+
     return {
         'status': result['status'],
         'alerts_created': alerts_created,
+        'unnotified_critical': [
+            {'id': a.id, 'type': a.alert_type, 'message': a.message,
+             'severity': a.severity}
+            for a in created_rows if a.severity == 'CRITICAL'
+        ],
         'safe_to_trade': result['safe_to_trade']
     }
 
@@ -144,15 +157,23 @@ def get_alert_history(db, limit: int = 50, include_resolved: bool = False) -> Li
     } for a in alerts]
 
 
-def get_unnotified_critical_alerts(db) -> List[Dict]:
-    """Get critical alerts that haven't been emailed yet."""
+def get_unnotified_critical_alerts(db, since: Optional[datetime] = None) -> List[Dict]:
+    """Get critical alerts that haven't been emailed yet.
+
+    With `since`, only alerts created after that time are returned; callers
+    use this as a debounce window so one digest covers an alert storm and
+    stale alerts don't re-trigger emails on every run.
+    """
     from models import DataAlert
-    
-    alerts = db.query(DataAlert).filter(
+
+    query = db.query(DataAlert).filter(
         DataAlert.severity == 'CRITICAL',
         DataAlert.notified == False,
         DataAlert.resolved == False
-    ).all()
+    )
+    if since is not None:
+        query = query.filter(DataAlert.timestamp >= since)
+    alerts = query.all()
     
     return [{
         'id': a.id,
@@ -50,6 +50,25 @@ def cached(ttl_minutes: int = 15):
     return decorator
 
 
+def get_cached(key: str) -> Any:
+    """Return the cached value for an explicit key, or None if absent or
+    expired. Pairs with set_cached for callers whose key depends on state
+    (e.g. a DB data version) that the @cached decorator can't derive from
+    the function arguments."""
+    entry = _cache.get(key)
+    if entry is None:
+        return None
+    value, timestamp = entry
+    if datetime.now() - timestamp < _cache_ttl:
+        return value
+    return None
+
+
+def set_cached(key: str, value: Any):
+    """Store a value under an explicit key (see get_cached)."""
+    _cache[key] = (value, datetime.now())
+
+
 def invalidate_cache(pattern: str = None):
     """
     Invalidate cache entries.
@@ -5,11 +5,10 @@ from email.mime.multipart import MIMEMultipart
 from datetime import date, timedelta
 from typing import Optional
 import os
-from pathlib import Path
-from dotenv import load_dotenv
 
-# Load .env file
-load_dotenv(Path(__file__).parent.parent / ".env")
+# .env loading happens (guarded) at config.settings import time; nothing
+# to do here.
+import config.settings  # noqa: F401
 
 
 def send_email(to: str, subject: str, body: str, html: Optional[str] = None) -> bool:
@@ -7,35 +7,40 @@ from datetime import date
 from dateutil.relativedelta import relativedelta
 
 
-def combine_strategies(strategy_results: dict[str, pd.DataFrame], equal_weighting: bool = True) -> pd.DataFrame:
+def combine_strategies(strategy_results: dict[str, list[str]], equal_weighting: bool = True) -> pd.DataFrame:
     """
     Combine multiple strategy results into a single portfolio.
-    
+
+    Takes a list of tickers (in rank order) per strategy and builds the
+    combined holdings frame in one columnar construction - no per-strategy
+    DataFrames and no row-dict per holding.
+
     Börslabbet "Svenska Portföljen" rules:
     - Equal weight across strategies
     - If stock appears in multiple strategies, it gets double weight (overlap_handling)
     """
     if not strategy_results:
         return pd.DataFrame(columns=['ticker', 'weight', 'strategy'])
-    
-    holdings = []
+
     num_strategies = len(strategy_results)
     strategy_weight = 1.0 / num_strategies if equal_weighting else 1.0
-    
-    for strategy_name, df in strategy_results.items():
-        if df.empty:
+
+    tickers: list[str] = []
+    weights: list[float] = []
+    strategies: list[str] = []
+    for strategy_name, strategy_tickers in strategy_results.items():
+        positions = len(strategy_tickers)
+        if positions == 0:
             continue
-        positions = len(df)
-        position_weight = strategy_weight / positions if positions > 0 else 0
-        
-        for _, row in df.iterrows():
-            holdings.append({
-                'ticker': row['ticker'],
-                'weight': position_weight,
-                'strategy': strategy_name
-            })
-    
-    return pd.DataFrame(holdings)
+        position_weight = strategy_weight / positions
+        tickers.extend(strategy_tickers)
+        weights.extend([position_weight] * positions)
+        strategies.extend([strategy_name] * positions)
+
+    return pd.DataFrame(
+        {'ticker': tickers, 'weight': weights, 'strategy': strategies},
+        copy=False,
+    )
 
 
 def get_next_rebalance_dates(strategies_config: dict, from_date: date = None) -> dict[str, date]:
@@ -63,6 +63,17 @@ BTA_PATTERN = re.compile(r'.* BTA')
 # Index product patterns
 INDEX_PATTERNS = ['OMXS30', 'S30MIN', 'OMXSML']
 
+# Precompiled helpers for classify_stock_type's hot loop: inline re.search
+# literals pay a pattern-cache lookup per row, and str.startswith accepts a
+# tuple directly instead of an any() generator per row
+DIGIT_LETTER_RE = re.compile(r'\d[A-Z]')           # warrant series marker
+DIGIT_LETTER_SPACE_RE = re.compile(r'\d[A-Z]\s')   # series followed by strike
+NDS_WARRANT_RE = re.compile(r'\d[A-Z]\s*\d+NDS')   # e.g., VOL6A 277NDSX
+STRIKE_PRICE_RE = re.compile(r'^[A-Z0-9]+\d[A-Z]\d{2,}[A-Z]?$')  # e.g., 8TRA6A235
+INDEX_PREFIXES = tuple(INDEX_PATTERNS)
+ETF_PREFIX_TUPLE = tuple(ETF_PREFIXES)
+ETP_NAME_PATTERNS_UPPER = [p.upper() for p in ETP_NAME_PATTERNS]
+
 
 def classify_stock_type(ticker: str, name: str = '') -> str:
     """Classify stock type based on ticker and name patterns.
@@ -82,31 +93,31 @@ def classify_stock_type(ticker: str, name: str = '') -> str:
     # === WARRANTS/OPTIONS ===
     # SHB bank warrants (ABB6A 700SHB, VOL6M 235SHB, SHBA6C84.61X)
     if ticker_upper.endswith('SHB') or ticker_upper.startswith('SHB'):
-        if re.search(r'\d[A-Z]', ticker_upper):
+        if DIGIT_LETTER_RE.search(ticker_upper):
             return 'warrant'
     # Nordea warrants (VOL6A 277NDSX, SEB6M 129NDSX)
-    if 'NDS' in ticker_upper and re.search(r'\d[A-Z]\s*\d+NDS', ticker_upper):
+    if 'NDS' in ticker_upper and NDS_WARRANT_RE.search(ticker_upper):
         return 'warrant'
     # BNP warrants and structured products (BNPXO36CAR0728, BNPO_GTM_4423)
     if ticker_upper.startswith('BNP'):
         return 'warrant'
     # AVA tracker warrants (TSL6R290AVA, OMX6F2600AVA, DAX6R19500AVA)
-    if ticker_upper.endswith('AVA') and re.search(r'\d[A-Z]', ticker_upper):
+    if ticker_upper.endswith('AVA') and DIGIT_LETTER_RE.search(ticker_upper):
         return 'warrant'
     # Warrant with strike price pattern (8TRA6A235, VOLV6A180, HM 6B 150, SBBB6A3.50)
     # Pattern: TICKER + digit + letter + digits (strike price, may have decimal)
     clean_ticker = ticker_upper.replace(' ', '').replace('.', '')
-    if re.match(r'^[A-Z0-9]+\d[A-Z]\d{2,}[A-Z]?$', clean_ticker):
+    if STRIKE_PRICE_RE.match(clean_ticker):
         return 'warrant'
     # Warrant series pattern (ABB6A, VOL6M, HM 6A - letter+digit+letter at position 2-5)
-    if WARRANT_SERIES_PATTERN.match(ticker_upper) and re.search(r'\d[A-Z]\s', ticker_upper):
+    if WARRANT_SERIES_PATTERN.match(ticker_upper) and DIGIT_LETTER_SPACE_RE.search(ticker_upper):
         return 'warrant'
     # Original warrant pattern (ASSAB7R200, HMB6B170)
     if WARRANT_PATTERN.match(ticker_upper):
         return 'warrant'
     
     # === INDEX PRODUCTS ===
-    if any(ticker_upper.startswith(p) for p in INDEX_PATTERNS):
+    if ticker_upper.startswith(INDEX_PREFIXES):
         return 'index_product'
     
     # === ETF/CERTIFICATES ===
@@ -120,7 +131,7 @@ def classify_stock_type(ticker: str, name: str = '') -> str:
     if any(p in ticker_upper for p in ETF_PATTERNS):
         return 'etf_certificate'
     # ETF prefixes
-    if any(ticker_upper.startswith(p) for p in ETF_PREFIXES):
+    if ticker_upper.startswith(ETF_PREFIX_TUPLE):
         return 'etf_certificate'
     # Crypto trackers
     if any(p in ticker_upper for p in CRYPTO_PATTERNS):
@@ -138,7 +149,7 @@ def classify_stock_type(ticker: str, name: str = '') -> str:
     if any(p in ticker_upper for p in STRUCTURED_PATTERNS):
         return 'etf_certificate'
     # Name-based ETP detection
-    if any(p.upper() in name_upper for p in ETP_NAME_PATTERNS):
+    if any(p in name_upper for p in ETP_NAME_PATTERNS_UPPER):
         return 'etf_certificate'
     
     # === BONDS ===
@@ -72,7 +72,7 @@ class TestTradingViewSync:
             with patch('services.ranking_cache.compute_all_rankings_tv') as mock_rankings:
                 mock_rankings.return_value = {'strategies': {}}
                 
-                result = await tradingview_sync(db)
+                result = tradingview_sync(db)
         
         assert result['status'] == 'SUCCESS'
         assert result['stocks_updated'] == 2
@@ -104,7 +104,7 @@ class TestTradingViewSync:
             mock_instance = MockFetcher.return_value
             mock_instance.fetch_all.return_value = []
             
-            result = await tradingview_sync(db)
+            result = tradingview_sync(db)
         
         assert result['status'] == 'ERROR'
         assert 'No data' in result['message']
@@ -129,7 +129,7 @@ class TestTradingViewSync:
                     'strategies': {'sammansatt_momentum': {'top_10': ['VOLV-B']}}
                 }
                 
-                result = await tradingview_sync(db)
+                result = tradingview_sync(db)
                 
                 # Verify rankings were computed
                 mock_rankings.assert_called_once()
@@ -278,7 +278,7 @@ class TestFallbackBehavior:
             mock_instance = MockFetcher.return_value
             mock_instance.fetch_all.side_effect = Exception("API Error")
             
-            result = await tradingview_sync(db)
+            result = tradingview_sync(db)
         
         assert result['status'] == 'ERROR'
         